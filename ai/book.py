@@ -0,0 +1,153 @@
+from __future__ import annotations
+import mmap
+import os
+import struct
+from collections import Counter
+from typing import Iterable
+
+from game.board import Board
+from game.zobrist import zobrist_table
+
+
+MAGIC = b"PBBK"
+VERSION = 1
+# magic, version, board size, record count
+HEADER = struct.Struct("<4sHHI")
+# canonical key, reply x, reply y (reply in the canonical frame)
+RECORD = struct.Struct("<QHH")
+# the book is only consulted while the board has at most this many stones
+MAX_BOOK_STONES = 16
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "opening.book")
+
+Stone = tuple[int, int, int]
+
+
+def transform(x: int, y: int, sym: int, size: int) -> tuple[int, int]:
+    """One of the 8 symmetries of the square board"""
+    m = size - 1
+    if sym & 4:
+        x, y = y, x
+    if sym & 1:
+        x = m - x
+    if sym & 2:
+        y = m - y
+    return x, y
+
+
+def inverse(x: int, y: int, sym: int, size: int) -> tuple[int, int]:
+    m = size - 1
+    if sym & 2:
+        y = m - y
+    if sym & 1:
+        x = m - x
+    if sym & 4:
+        x, y = y, x
+    return x, y
+
+
+def canonical(stones: Iterable[Stone], size: int) -> tuple[int, int]:
+    """(key, symmetry) with the smallest Zobrist key over the 8 symmetries"""
+    table = zobrist_table(size)
+    stones = list(stones)
+    best_key, best_sym = -1, 0
+    for sym in range(8):
+        key = 0
+        for x, y, player in stones:
+            tx, ty = transform(x, y, sym, size)
+            key ^= table[(ty * size + tx) * 2 + player - 1]
+        if best_key < 0 or key < best_key:
+            best_key, best_sym = key, sym
+    return best_key, best_sym
+
+
+def to_move_as_one(stones: Iterable[Stone], player: int) -> list[Stone]:
+    """Recolour so that the side to move owns the stones marked 1"""
+    if player == 1:
+        return list(stones)
+    return [(x, y, 3 - p) for x, y, p in stones]
+
+
+class OpeningBook:
+    """Sorted fixed-size records read straight from a memory map.
+
+    Lookups are a binary search over the file, nothing is parsed at
+    start-up beyond the header.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, self.count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f"{path}: not an opening book")
+        if len(self.map) < HEADER.size + self.count * RECORD.size:
+            self.map.close()
+            raise ValueError(f"{path}: truncated opening book")
+
+    @classmethod
+    def open_default(cls, path: str | None = None) -> OpeningBook | None:
+        """Book at path, PBRAIN_BOOK or next to the engine; None if absent"""
+        path = path or os.environ.get("PBRAIN_BOOK") or DEFAULT_PATH
+        if not os.path.isfile(path):
+            return None
+        try:
+            return cls(path)
+        except (ValueError, OSError):
+            return None
+
+    def close(self) -> None:
+        self.map.close()
+
+    def _find(self, key: int) -> tuple[int, int] | None:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            k, x, y = RECORD.unpack_from(self.map, HEADER.size + mid * RECORD.size)
+            if k < key:
+                lo = mid + 1
+            elif k > key:
+                hi = mid
+            else:
+                return x, y
+        return None
+
+    def lookup(self, board: Board) -> tuple[int, int] | None:
+        """Book reply for player 1 to move on board, if any"""
+        if board.size != self.size or len(board.history) > MAX_BOOK_STONES:
+            return None
+        key, sym = canonical(board.history, board.size)
+        found = self._find(key)
+        if found is None:
+            return None
+        x, y = inverse(found[0], found[1], sym, board.size)
+        if not board.is_valid_move(x, y):
+            return None
+        return x, y
+
+
+def build_book(
+    path: str, size: int, positions: Iterable[tuple[list[Stone], tuple[int, int]]]
+) -> int:
+    """Write a book from (stones, reply) pairs where 1 is the side to move.
+
+    The most frequent reply is kept for each canonical position. Returns
+    the number of records written.
+    """
+    replies: dict[int, Counter] = {}
+    for stones, (x, y) in positions:
+        if len(stones) > MAX_BOOK_STONES:
+            continue
+        key, sym = canonical(stones, size)
+        replies.setdefault(key, Counter())[transform(x, y, sym, size)] += 1
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, size, len(replies)))
+        for key in sorted(replies):
+            (x, y), _ = replies[key].most_common(1)[0]
+            f.write(RECORD.pack(key, x, y))
+    os.replace(tmp, path)
+    return len(replies)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+from game.board import Board
+
+
+DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+# MinimaxAI._position_value gives every stone of a run of length L the
+# value below, so a whole run is worth L * value(L)
+RUN_SCORES = (0, 0, 2 * 100, 3 * 1000, 4 * 10000)
+FIVE_VALUE = 100000
+
+
+def run_score(length: int) -> int:
+    if length >= 5:
+        return length * FIVE_VALUE
+    return RUN_SCORES[length]
+
+
+def line_index(direction: int, x: int, y: int) -> int:
+    """Index of the line through (x, y) among the lines of one direction"""
+    if direction == 0:
+        return y
+    if direction == 1:
+        return x
+    if direction == 2:
+        return x - y
+    return x + y
+
+
+class IncrementalEvaluator:
+    """Per-line run scores for both players, kept current by the board.
+
+    Registered as a board watcher: a stone placed or removed only
+    changes the runs it joins or splits on its four lines, so each
+    update walks those runs and adjusts the line and player totals.
+    """
+
+    def __init__(self, board: Board):
+        self.board = board
+        self.reset()
+        board.watchers.append(self)
+
+    @classmethod
+    def attach(cls, board: Board) -> IncrementalEvaluator:
+        """Evaluator already watching board, or a new one"""
+        for watcher in board.watchers:
+            if isinstance(watcher, cls):
+                return watcher
+        return cls(board)
+
+    def reset(self) -> None:
+        n = self.board.size
+        # lines[player][direction] maps line_index -> score (diagonals may be negative)
+        self.lines: list[list[dict[int, int]]] = [[{} for _ in DIRECTIONS] for _ in range(3)]
+        self.totals = [0, 0, 0]
+        grid = self.board.grid
+        for player in (1, 2):
+            for i in self.board.stones[player]:
+                x, y = i % n, i // n
+                for d, (dx, dy) in enumerate(DIRECTIONS):
+                    px, py = x - dx, y - dy
+                    if 0 <= px < n and 0 <= py < n and grid[py][px] == player:
+                        continue
+                    length = 1 + self.board.count_consecutive(x, y, dx, dy, player)
+                    self._add(player, d, line_index(d, x, y), run_score(length))
+
+    def _add(self, player: int, d: int, line: int, delta: int) -> None:
+        if not delta:
+            return
+        scores = self.lines[player][d]
+        scores[line] = scores.get(line, 0) + delta
+        self.totals[player] += delta
+
+    def on_set(self, x: int, y: int, old: int, new: int) -> None:
+        board = self.board
+        for d, (dx, dy) in enumerate(DIRECTIONS):
+            line = line_index(d, x, y)
+            if old:
+                left = board.count_consecutive(x, y, -dx, -dy, old)
+                right = board.count_consecutive(x, y, dx, dy, old)
+                self._add(old, d, line, run_score(left) + run_score(right) - run_score(left + right + 1))
+            if new:
+                left = board.count_consecutive(x, y, -dx, -dy, new)
+                right = board.count_consecutive(x, y, dx, dy, new)
+                self._add(new, d, line, run_score(left + right + 1) - run_score(left) - run_score(right))
+
+    def score(self, player: int) -> int:
+        return self.totals[player] - self.totals[3 - player]
@@ -1,24 +1,109 @@
 from __future__ import annotations
+import time
+from typing import Iterator
 from game.board import Board
+from ai.evaluator import IncrementalEvaluator
 from ai.patterns import PatternDetector
+from ai.pattern_table import (
+    FIELD_MASK,
+    FIVE_SHIFT,
+    FOUR_SHIFT,
+    OPEN_FOUR_SHIFT,
+    SCORE_TABLE,
+    THREAT_TABLE,
+    THREAT_WEIGHTS,
+)
+from ai.transposition import EXACT, LOWER, UPPER, TranspositionTable
+from game.zobrist import SIDE_KEYS
+
+
+WIN_SCORE = 100000
+# nodes between two looks at the clock
+CHECK_INTERVAL = 64
+# candidates searched at each node, best pattern scores first
+MAX_CANDIDATES = 10
+# killer moves remembered per ply
+KILLER_SLOTS = 2
+# half-width of the root window around the previous iteration's score
+ASPIRATION_WINDOW = 3000
+
+# forcing plies searched past the horizon, and nodes allowed for it per leaf
+QUIESCENCE_DEPTH = 6
+QUIESCENCE_NODES = 16
+
+FIVE = FIELD_MASK << FIVE_SHIFT
+FOURS = (FIELD_MASK << OPEN_FOUR_SHIFT) | (FIELD_MASK << FOUR_SHIFT)
+DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search once the deadline has passed or on abort"""
 
 
 class MinimaxAI:
-    def __init__(self, depth: int = 2):
+    def __init__(
+        self, depth: int = 2, tt: TranspositionTable | None = None, backend: str = "python"
+    ):
+        if backend == "numpy":
+            # NumPy is only imported by the engines that use it
+            from ai import vectorized
+            if not vectorized.NUMPY_AVAILABLE:
+                raise ValueError("backend 'numpy' needs NumPy installed")
+        self.backend = backend
         self.max_depth = depth
+        self.tt = tt if tt is not None else TranspositionTable()
+        self.deadline: float | None = None
+        # set from another thread to stop the running search
+        self.abort = False
+        # per-search statistics: plain counters bumped in the search itself
+        # (nodes doubles as the deadline check interval), read by the
+        # tracer once per move
+        self.nodes = 0
+        self.cutoffs = 0
+        self.tt_cutoffs = 0
+        self.researches = 0
+        self.qnodes = 0
+        self._qs_left = 0
+        # history length at the root of the running search
+        self.root_ply: int | None = None
+        self.completed_depth = 0
+        # score and principal variation of the last completed iteration
+        self.score: float | None = None
+        self.pv: list[tuple[int, int]] = []
+        # move ordering state, kept across iterations and turns
+        self.killers: dict[int, list[tuple[int, int]]] = {}
+        self.history: list[list[int]] = [[], [], []]
+        self._evaluator: IncrementalEvaluator | None = None
+        self._detector: PatternDetector | None = None
+
+    def set_memory_limit(self, max_memory: int) -> None:
+        """Resize the transposition table from INFO max_memory (bytes)"""
+        capacity = TranspositionTable.capacity_for(max_memory)
+        if capacity != self.tt.capacity:
+            self.tt.resize(capacity)
+
+    def new_game(self) -> None:
+        self.tt.clear()
+        self.killers.clear()
+        self.history = [[], [], []]
 
     def evaluate(self, board: Board, player: int) -> int:
-        """Fast evaluation"""
+        """Evaluation read from the incrementally maintained line scores"""
+        evaluator = self._evaluator
+        if evaluator is None or evaluator.board is not board:
+            evaluator = self._evaluator = IncrementalEvaluator.attach(board)
+        return evaluator.score(player)
+
+    def evaluate_full(self, board: Board, player: int) -> int:
+        """Full-board evaluation, reference for the incremental one"""
         score = 0
         opponent = 3 - player
+        n = board.size
 
-        for y in range(board.size):
-            for x in range(board.size):
-                cell = board.grid[y][x]
-                if cell == player:
-                    score += self._position_value(board, x, y, player)
-                elif cell == opponent:
-                    score -= self._position_value(board, x, y, opponent)
+        for i in board.stones[player]:
+            score += self._position_value(board, i % n, i // n, player)
+        for i in board.stones[opponent]:
+            score -= self._position_value(board, i % n, i // n, opponent)
 
         return score
 
@@ -63,33 +148,60 @@ class MinimaxAI:
         maximizing: bool,
         player: int,
     ) -> tuple[float, tuple[int, int] | None]:
-        """Minimax with alpha-beta (no deepcopy!)"""
+        """Minimax with alpha-beta, make/undo on the board (no deepcopy!)"""
         opponent = 3 - player
 
-        if depth == 0:
-            return self.evaluate(board, player), None
+        self.nodes += 1
+        if not self.nodes % CHECK_INTERVAL and (
+            self.abort
+            or (self.deadline is not None and time.perf_counter() >= self.deadline)
+        ):
+            raise SearchTimeout
 
-        if board.check_win(player):
-            return 100000 + depth * 1000, None
-        if board.check_win(opponent):
-            return -100000 - depth * 1000, None
+        if depth == 0:
+            self._qs_left = QUIESCENCE_NODES
+            return self.quiescence(board, alpha, beta, maximizing, player, QUIESCENCE_DEPTH), None
 
-        detector = PatternDetector(board)
-        candidates = detector.find_critical_moves(player)
+        if board.last_move_wins():
+            if board.history[-1][2] == player:
+                return WIN_SCORE + depth * 1000, None
+            return -WIN_SCORE - depth * 1000, None
 
-        if not candidates:
-            return self.evaluate(board, player), None
+        key = board.hash ^ SIDE_KEYS[player] ^ (SIDE_KEYS[3] if maximizing else 0)
+        alpha_orig, beta_orig = alpha, beta
+        entry = self.tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            _, tt_depth, flag, tt_score, tt_move = entry
+            if tt_depth >= depth:
+                if flag == EXACT:
+                    self.tt_cutoffs += 1
+                    return tt_score, tt_move
+                if flag == LOWER:
+                    alpha = max(alpha, tt_score)
+                else:
+                    beta = min(beta, tt_score)
+                if beta <= alpha:
+                    self.tt_cutoffs += 1
+                    return tt_score, tt_move
 
         best_move = None
+        ply = len(board.history)
 
+        # principal variation search: the first move gets the full window,
+        # the others a null window, re-searched only if they beat it
         if maximizing:
             max_score = -float("inf")
-            for x, y, _ in candidates[:10]:
-                board.grid[y][x] = player
-                score, _ = self.minimax(
-                    board, depth - 1, alpha, beta, False, player
-                )
-                board.grid[y][x] = 0
+            for x, y in self.ordered_moves(board, player, ply, tt_move):
+                board.make_move(x, y, player)
+                if best_move is None:
+                    score, _ = self.minimax(board, depth - 1, alpha, beta, False, player)
+                else:
+                    score, _ = self.minimax(board, depth - 1, alpha, alpha + 1, False, player)
+                    if alpha < score < beta:
+                        self.researches += 1
+                        score, _ = self.minimax(board, depth - 1, alpha, beta, False, player)
+                board.undo_move()
 
                 if score > max_score:
                     max_score = score
@@ -97,17 +209,26 @@ class MinimaxAI:
 
                 alpha = max(alpha, score)
                 if beta <= alpha:
+                    self.cutoffs += 1
+                    self._reward(player, ply, best_move, depth, board.size)
                     break
 
+            if best_move is None:
+                return self.evaluate(board, player), None
+            self._store(key, depth, max_score, alpha_orig, beta_orig, best_move)
             return max_score, best_move
         else:
             min_score = float("inf")
-            for x, y, _ in candidates[:10]:
-                board.grid[y][x] = opponent
-                score, _ = self.minimax(
-                    board, depth - 1, alpha, beta, True, player
-                )
-                board.grid[y][x] = 0
+            for x, y in self.ordered_moves(board, opponent, ply, tt_move):
+                board.make_move(x, y, opponent)
+                if best_move is None:
+                    score, _ = self.minimax(board, depth - 1, alpha, beta, True, player)
+                else:
+                    score, _ = self.minimax(board, depth - 1, beta - 1, beta, True, player)
+                    if alpha < score < beta:
+                        self.researches += 1
+                        score, _ = self.minimax(board, depth - 1, alpha, beta, True, player)
+                board.undo_move()
 
                 if score < min_score:
                     min_score = score
@@ -115,15 +236,294 @@ class MinimaxAI:
 
                 beta = min(beta, score)
                 if beta <= alpha:
+                    self.cutoffs += 1
+                    self._reward(opponent, ply, best_move, depth, board.size)
                     break
 
+            if best_move is None:
+                return self.evaluate(board, player), None
+            self._store(key, depth, min_score, alpha_orig, beta_orig, best_move)
             return min_score, best_move
 
+    def quiescence(
+        self, board: Board, alpha: float, beta: float, maximizing: bool, player: int,
+        depth: int,
+    ) -> float:
+        """Static evaluation, unless the last two moves left something forcing.
+
+        Only the lines through those moves are looked at: if the side to
+        move can make five it wins, if the last move threatens five it has
+        to block (no standing pat), otherwise it may stand pat on the
+        evaluation or play a four of its own. Each horizon leaf gets
+        QUIESCENCE_NODES nodes; once they are spent, positions are scored
+        statically.
+        """
+        if board.last_move_wins():
+            if board.history[-1][2] == player:
+                return WIN_SCORE
+            return -WIN_SCORE
+
+        stand = self.evaluate(board, player)
+        history = board.history
+        if depth == 0 or self._qs_left <= 0 or len(history) < 2:
+            return stand
+        self._qs_left -= 1
+        self.qnodes += 1
+        self.nodes += 1
+        if not self.nodes % CHECK_INTERVAL and (
+            self.abort
+            or (self.deadline is not None and time.perf_counter() >= self.deadline)
+        ):
+            raise SearchTimeout
+
+        side = player if maximizing else 3 - player
+        mine = blocks = []
+        if history[-2][2] == side:
+            mine = self._line_threats(board, history[-2], side, FIVE | FOURS)
+            if any(threat & FIVE for _, threat, _ in mine):
+                return WIN_SCORE if maximizing else -WIN_SCORE
+        if history[-1][2] != side:
+            blocks = self._line_threats(board, history[-1], 3 - side, FIVE)
+        if blocks:
+            moves = blocks
+            best = -float("inf") if maximizing else float("inf")
+        else:
+            moves = mine
+            best = stand
+            if maximizing:
+                if stand >= beta:
+                    return stand
+                alpha = max(alpha, stand)
+            else:
+                if stand <= alpha:
+                    return stand
+                beta = min(beta, stand)
+
+        for _, _, (x, y) in moves:
+            board.make_move(x, y, side)
+            score = self.quiescence(board, alpha, beta, not maximizing, player, depth - 1)
+            board.undo_move()
+            if maximizing:
+                best = max(best, score)
+                alpha = max(alpha, score)
+            else:
+                best = min(best, score)
+                beta = min(beta, score)
+            if beta <= alpha:
+                break
+        return best
+
+    def _line_threats(
+        self, board: Board, move: tuple[int, int, int], side: int, mask: int
+    ) -> list[tuple[int, int, tuple[int, int]]]:
+        """(score, threat, cell) of the empty cells on the four lines
+        through move where side has a threat in mask along that line,
+        best first"""
+        key = self.detector(board)._line_key
+        grid = board.grid
+        n = board.size
+        x, y = move[0], move[1]
+        found = {}
+        for dx, dy in DIRECTIONS:
+            for k in (-4, -3, -2, -1, 1, 2, 3, 4):
+                cx, cy = x + k * dx, y + k * dy
+                if 0 <= cx < n and 0 <= cy < n and not grid[cy][cx]:
+                    line = key(cx, cy, dx, dy, side)
+                    threat = THREAT_TABLE[line]
+                    if threat & mask:
+                        score, seen, _ = found.get((cx, cy), (0, 0, None))
+                        found[(cx, cy)] = (score + SCORE_TABLE[line], seen | threat, (cx, cy))
+        return sorted(found.values(), reverse=True)
+
+    def ordered_moves(
+        self, board: Board, side: int, ply: int, tt_move: tuple[int, int] | None
+    ) -> Iterator[tuple[int, int]]:
+        """Moves for side in stages, generated lazily.
+
+        The transposition table move comes first, before anything is
+        generated, so a cut-off on it skips the board scan. Below the
+        root, this ply's killers follow while the lines through the last
+        two moves hold no five for either side: inside the search a five
+        can only come from those moves, every older one was played or
+        blocked. Then, if side can make five or must stop one, only those
+        moves; otherwise the best candidates by pattern score plus
+        history.
+        """
+        tried = [tt_move]
+        if tt_move is not None and board.is_valid_move(*tt_move):
+            yield tt_move
+
+        killers = self.killers.get(ply, ())
+        if killers and self.root_ply is not None and ply > self.root_ply and self._quiet(board):
+            for move in killers:
+                if move not in tried and board.is_valid_move(*move):
+                    tried.append(move)
+                    yield move
+
+        candidates = self.critical_moves(board, side)
+        forced = self._forced(board, side, candidates)
+        candidates = forced if forced is not None else candidates[:MAX_CANDIDATES]
+
+        n = board.size
+        history = self.history[side]
+        if len(history) != n * n:
+            history = self.history[side] = [0] * (n * n)
+        candidates.sort(
+            key=lambda c: ((c[0], c[1]) in killers, c[2] + history[c[1] * n + c[0]]),
+            reverse=True,
+        )
+        for x, y, _ in candidates:
+            if (x, y) not in tried:
+                yield (x, y)
+
+    def _quiet(self, board: Board) -> bool:
+        """No five on the lines through the last two moves for the player
+        who made them"""
+        history = board.history
+        if len(history) < 2:
+            return False
+        for move in history[-2:]:
+            if self._line_threats(board, move, move[2], FIVE):
+                return False
+        return True
+
+    def _forced(
+        self, board: Board, side: int, candidates: list[tuple[int, int, int]]
+    ) -> list[tuple[int, int, int]] | None:
+        """The winning move, or the cells blocking the opponent's five"""
+        analyze = self.detector(board).analyze_packed
+        blocks = []
+        # candidates are sorted by score and only a five scores this much
+        for x, y, score in candidates:
+            if score < THREAT_WEIGHTS["five"]:
+                break
+            if analyze(x, y, side) & FIVE:
+                return [(x, y, score)]
+            if analyze(x, y, 3 - side) & FIVE:
+                blocks.append((x, y, score))
+        return blocks or None
+
+    def _reward(
+        self, side: int, ply: int, move: tuple[int, int], depth: int, size: int
+    ) -> None:
+        """Killer and history credit for the move that caused a cut-off"""
+        killers = self.killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[KILLER_SLOTS:]
+        history = self.history[side]
+        if len(history) == size * size:
+            history[move[1] * size + move[0]] += depth * depth
+
+    def detector(self, board: Board) -> PatternDetector:
+        detector = self._detector
+        if detector is None or detector.board is not board:
+            detector = self._detector = PatternDetector(board)
+        return detector
+
+    def critical_moves(self, board: Board, player: int) -> list[tuple[int, int, int]]:
+        if self.backend == "numpy":
+            from ai import vectorized
+            return vectorized.find_critical_moves(board, player)
+        return self.detector(board).find_critical_moves(player)
+
+    def _store(
+        self, key: int, depth: int, score: float, alpha: float, beta: float,
+        move: tuple[int, int] | None,
+    ) -> None:
+        if score <= alpha:
+            flag = UPPER
+        elif score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, flag, score, move)
+
     def find_best_move(
-        self, board: Board, player: int
+        self, board: Board, player: int, deadline: float | None = None
     ) -> tuple[int, int] | None:
-        """Find best move"""
-        _, move = self.minimax(
-            board, self.max_depth, -float("inf"), float("inf"), True, player
-        )
-        return move
\ No newline at end of file
+        """Iterative deepening up to max_depth, stopped at deadline.
+
+        Returns the best move of the last fully completed iteration, whose
+        score and principal variation are left in score and pv. Each
+        iteration first searches a window around the previous score and
+        only widens it on a fail.
+        """
+        self.tt.new_search()
+        # older history counts for less than what this search learns
+        for history in self.history:
+            for i, value in enumerate(history):
+                if value:
+                    history[i] = value >> 1
+        self.deadline = deadline
+        self.nodes = self.cutoffs = self.tt_cutoffs = self.researches = self.qnodes = 0
+        self.completed_depth = 0
+        self.score = None
+        self.pv = []
+        root = self.root_ply = len(board.history)
+        best = None
+
+        try:
+            for depth in range(1, self.max_depth + 1):
+                started = time.perf_counter()
+                if self.score is None or abs(self.score) >= WIN_SCORE:
+                    low, high = -float("inf"), float("inf")
+                else:
+                    low, high = self.score - ASPIRATION_WINDOW, self.score + ASPIRATION_WINDOW
+                while True:
+                    score, move = self.minimax(board, depth, low, high, True, player)
+                    if score <= low:
+                        low = -float("inf")
+                    elif score >= high:
+                        high = float("inf")
+                    else:
+                        break
+                    self.researches += 1
+                if move is None:
+                    break
+                best = move
+                self.score = score
+                self.pv = self.principal_variation(board, player, depth, move)
+                self.completed_depth = depth
+                if abs(score) >= WIN_SCORE:
+                    break
+                # the next iteration costs several times this one
+                spent = time.perf_counter() - started
+                if deadline is not None and time.perf_counter() + 2 * spent >= deadline:
+                    break
+        except SearchTimeout:
+            while len(board.history) > root:
+                board.undo_move()
+        finally:
+            self.deadline = None
+            self.root_ply = None
+
+        if best is None:
+            candidates = self.critical_moves(board, player)
+            if candidates:
+                best = (candidates[0][0], candidates[0][1])
+                self.pv = [best]
+        return best
+
+    def principal_variation(
+        self, board: Board, player: int, length: int, first: tuple[int, int]
+    ) -> list[tuple[int, int]]:
+        """Best line from the root, first move given, the rest read back
+        from the transposition table"""
+        pv = [first]
+        board.make_move(first[0], first[1], player)
+        maximizing = False
+        try:
+            while len(pv) < length and not board.last_move_wins():
+                key = board.hash ^ SIDE_KEYS[player] ^ (SIDE_KEYS[3] if maximizing else 0)
+                entry = self.tt.probe(key)
+                if entry is None or entry[4] is None or not board.is_valid_move(*entry[4]):
+                    break
+                move = entry[4]
+                board.make_move(move[0], move[1], player if maximizing else 3 - player)
+                pv.append(move)
+                maximizing = not maximizing
+        finally:
+            for _ in pv:
+                board.undo_move()
+        return pv
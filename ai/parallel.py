@@ -0,0 +1,186 @@
+from __future__ import annotations
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import Value
+
+from game.board import Board
+from game.bitboard import BitBoard
+from ai.minimax import WIN_SCORE, MinimaxAI, SearchTimeout
+from ai.patterns import PatternDetector
+
+
+ENGINES: dict[str, type[Board]] = {"grid": Board, "bitboard": BitBoard}
+# the serial search only looks at the 10 best candidates at each node
+ROOT_MOVES = 10
+# extra time granted to a round for process start-up and result transfer
+ROUND_GRACE = 0.05
+
+
+def serialize(board: Board) -> bytes:
+    """Board size followed by (x, y, player) bytes in move order"""
+    data = array("B", [board.size])
+    for x, y, player in board.history:
+        data.extend((x, y, player))
+    return data.tobytes()
+
+
+def deserialize(data: bytes, engine: str = "grid") -> Board:
+    board = ENGINES[engine](data[0])
+    for i in range(1, len(data), 3):
+        board.make_move(data[i], data[i + 1], data[i + 2])
+    return board
+
+
+_alpha = None
+_ai: MinimaxAI | None = None
+
+
+class SharedFlag:
+    """Truth value of a shared byte, set by the parent process; stands in
+    for MinimaxAI.abort in the workers (read every CHECK_INTERVAL nodes)"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def __bool__(self) -> bool:
+        return bool(self.value.value)
+
+
+def _init_worker(alpha, stop) -> None:
+    global _alpha, _ai
+    _alpha = alpha
+    _ai = MinimaxAI()
+    _ai.abort = SharedFlag(stop)
+
+
+def _search_moves(
+    data: bytes, engine: str, player: int, moves: list[tuple[int, int]],
+    depth: int, budget: float | None,
+) -> tuple[float, tuple[int, int] | None, bool, int, list[tuple[int, int]]] | None:
+    """Best (score, move, exact, nodes, principal variation) among moves,
+    None if out of time or stopped.
+
+    exact is False when the best score is only an upper bound because
+    another worker had already raised alpha above it.
+    """
+    board = deserialize(data, engine)
+    _ai.deadline = None if budget is None else time.perf_counter() + budget
+    _ai.nodes = 0
+    _ai.root_ply = len(board.history)
+    _ai.tt.new_search()
+    best_score, best_move, best_exact = -float("inf"), None, False
+    try:
+        for x, y in moves:
+            alpha = _alpha.value
+            board.make_move(x, y, player)
+            score, _ = _ai.minimax(board, depth - 1, alpha, float("inf"), False, player)
+            board.undo_move()
+            if score > best_score:
+                best_score, best_move, best_exact = score, (x, y), score > alpha
+            with _alpha.get_lock():
+                if score > _alpha.value:
+                    _alpha.value = score
+    except SearchTimeout:
+        return None
+    finally:
+        _ai.deadline = None
+        _ai.root_ply = None
+    pv = [] if best_move is None else _ai.principal_variation(board, player, depth, best_move)
+    return best_score, best_move, best_exact, _ai.nodes, pv
+
+
+class ParallelSearch:
+    """Root-splitting search over a pool of worker processes.
+
+    Each iteration spreads the root candidates over the workers, which
+    search them with their own transposition table and share the best
+    root score found so far as alpha through shared memory.
+    """
+
+    def __init__(self, workers: int, depth: int = 2, engine: str = "grid"):
+        self.workers = workers
+        self.max_depth = depth
+        self.engine = engine
+        self.alpha = Value("d", -float("inf"))
+        # raised to stop the tasks of a round that ran out of time
+        self.stop = Value("b", 0)
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(self.alpha, self.stop)
+        )
+        self.completed_depth = 0
+        self.nodes = 0
+        # score and principal variation of the last completed iteration
+        self.score: float | None = None
+        self.pv: list[tuple[int, int]] = []
+
+    def close(self) -> None:
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def search_depth(
+        self, board: Board, player: int, depth: int, deadline: float | None = None
+    ) -> tuple[float, tuple[int, int] | None] | None:
+        """(score, move) of one root iteration, None if it did not finish"""
+        candidates = PatternDetector(board).find_critical_moves(player)[:ROOT_MOVES]
+        if not candidates:
+            return None
+        moves = [(x, y) for x, y, _ in candidates]
+        data = serialize(board)
+        self.alpha.value = -float("inf")
+        self.stop.value = 0
+
+        chunks = [moves[i::self.workers] for i in range(self.workers)]
+        budget = None if deadline is None else deadline - time.perf_counter()
+        futures = [
+            self.pool.submit(_search_moves, data, self.engine, player, chunk, depth, budget)
+            for chunk in chunks if chunk
+        ]
+        done, pending = wait(futures, timeout=None if budget is None else budget + ROUND_GRACE)
+        if pending:
+            # stragglers would hold the workers into the next turn's rounds
+            self.stop.value = 1
+            wait(pending)
+            return None
+        results = [f.result() for f in done]
+        if any(r is None for r in results):
+            return None
+
+        best_score, best_move, best_exact, best_pv = -float("inf"), None, False, []
+        for score, move, exact, nodes, pv in results:
+            self.nodes += nodes
+            # exact ties go to the better-ordered candidate, as in the serial search
+            if score > best_score or (
+                score == best_score and exact
+                and (not best_exact or moves.index(move) < moves.index(best_move))
+            ):
+                best_score, best_move, best_exact, best_pv = score, move, exact, pv
+        self.pv = best_pv
+        return best_score, best_move
+
+    def find_best_move(
+        self, board: Board, player: int, deadline: float | None = None
+    ) -> tuple[int, int] | None:
+        """Iterative deepening like MinimaxAI.find_best_move"""
+        self.completed_depth = 0
+        self.nodes = 0
+        self.score = None
+        self.pv = []
+        best = None
+        for depth in range(1, self.max_depth + 1):
+            started = time.perf_counter()
+            result = self.search_depth(board, player, depth, deadline)
+            if result is None:
+                break
+            score, best = result
+            self.score = score
+            self.completed_depth = depth
+            if abs(score) >= WIN_SCORE:
+                break
+            spent = time.perf_counter() - started
+            if deadline is not None and time.perf_counter() + 2 * spent >= deadline:
+                break
+        if best is None:
+            candidates = PatternDetector(board).find_critical_moves(player)
+            if candidates:
+                best = (candidates[0][0], candidates[0][1])
+        return best
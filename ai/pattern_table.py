@@ -0,0 +1,149 @@
+from __future__ import annotations
+from ai.table_cache import cached_tables
+
+
+# A direction is read as the 8 cells at offsets -4..-1, 1..4 around the
+# move, each encoded in base 3 relative to the player about to move.
+EMPTY, OWN, BLOCKED = 0, 1, 2
+OFFSETS = (-4, -3, -2, -1, 1, 2, 3, 4)
+WEIGHTS = tuple(3 ** i for i in range(len(OFFSETS)))
+TABLE_SIZE = 3 ** len(OFFSETS)
+
+# threat counts are packed as 4-bit fields, so the packed values of the
+# four directions can simply be added together
+FIVE_SHIFT = 0
+OPEN_FOUR_SHIFT = 4
+FOUR_SHIFT = 8
+OPEN_THREE_SHIFT = 12
+TWO_SHIFT = 16
+FIELD_MASK = 0xF
+
+THREAT_FIELDS = (
+    ("five", FIVE_SHIFT),
+    ("open_four", OPEN_FOUR_SHIFT),
+    ("four", FOUR_SHIFT),
+    ("open_three", OPEN_THREE_SHIFT),
+    ("two", TWO_SHIFT),
+)
+
+# same weights as PatternDetector._quick_score
+THREAT_WEIGHTS = {
+    "five": 100000,
+    "open_four": 10000,
+    "four": 1000,
+    "open_three": 500,
+    "two": 10,
+}
+
+
+def classify_line(cells: list[int]) -> tuple[int, int, int, int, int]:
+    """Threat counts (five, open_four, four, open_three, two) of one line.
+
+    cells holds the 9 states at offsets -4..4 with the move in the middle;
+    this is the cell-by-cell scan PatternDetector used to run per move.
+    """
+    five = open_four = four = open_three = two = 0
+    center = 4
+
+    left_count = 0
+    open_left = False
+    i = center - 1
+    while i >= 0 and cells[i] == OWN:
+        left_count += 1
+        i -= 1
+    if i >= 0 and cells[i] == EMPTY:
+        open_left = True
+
+    right_count = 0
+    open_right = False
+    i = center + 1
+    while i < 9 and cells[i] == OWN:
+        right_count += 1
+        i += 1
+    if i < 9 and cells[i] == EMPTY:
+        open_right = True
+
+    count = 1 + left_count + right_count
+    if count >= 5:
+        five += 1
+    elif count == 4:
+        if open_left and open_right:
+            open_four += 1
+        elif open_left or open_right:
+            four += 1
+    elif count == 3:
+        if open_left and open_right:
+            open_three += 1
+    elif count == 2:
+        if open_left or open_right:
+            two += 1
+
+    if count < 5:
+        gap = _gap_pattern(cells)
+        if gap == 4:
+            four += 1
+        elif gap == 3:
+            open_three += 1
+
+    return five, open_four, four, open_three, two
+
+
+def _gap_pattern(cells: list[int]) -> int:
+    for start in range(0, 5):
+        stones = 0
+        has_gap = False
+        blocked = 0
+        for i in range(5):
+            cell = cells[start + i]
+            if cell == OWN:
+                stones += 1
+            elif cell == EMPTY:
+                if has_gap:
+                    break
+                has_gap = True
+            else:
+                blocked += 1
+        if stones == 4 and has_gap and blocked == 0:
+            return 4
+        elif stones == 3 and has_gap and blocked == 0:
+            return 3
+    return 0
+
+
+def pack(counts: tuple[int, int, int, int, int]) -> int:
+    packed = 0
+    for (_, shift), value in zip(THREAT_FIELDS, counts):
+        packed |= value << shift
+    return packed
+
+
+def unpack(packed: int) -> dict[str, int]:
+    return {name: (packed >> shift) & FIELD_MASK for name, shift in THREAT_FIELDS}
+
+
+def packed_score(packed: int) -> int:
+    return sum(
+        ((packed >> shift) & FIELD_MASK) * THREAT_WEIGHTS[name]
+        for name, shift in THREAT_FIELDS
+    )
+
+
+def build_tables() -> tuple[list[int], list[int]]:
+    """(threats, scores) indexed by the base-3 key of a direction"""
+    threats = [0] * TABLE_SIZE
+    scores = [0] * TABLE_SIZE
+    cells = [EMPTY] * 9
+    cells[4] = OWN
+    for key in range(TABLE_SIZE):
+        k = key
+        for i, offset in enumerate(OFFSETS):
+            cells[offset + 4] = k % 3
+            k //= 3
+        packed = pack(classify_line(cells))
+        threats[key] = packed
+        scores[key] = packed_score(packed)
+    return threats, scores
+
+
+# built once, then loaded from tables.cache by every engine launch
+THREAT_TABLE, SCORE_TABLE = cached_tables(__file__, build_tables, 2, TABLE_SIZE)
@@ -1,5 +1,20 @@
 from __future__ import annotations
+from heapq import nlargest
 from game.board import Board
+from ai.pattern_table import OFFSETS, SCORE_TABLE, THREAT_TABLE, WEIGHTS, unpack
+
+
+LINE_CELLS = tuple(zip(OFFSETS, WEIGHTS))
+# find_critical_moves ranks cells by score << CELL_BITS | (CELL_MASK - index),
+# one int per cell, so equal scores keep the order of increasing index
+CELL_BITS = 14
+CELL_MASK = (1 << CELL_BITS) - 1
+CRITICAL_MOVES = 15
+# (dx, dy, weight) of the line cells for each of the four directions
+DIRECTION_STEPS = tuple(
+    tuple((offset * dx, offset * dy, weight) for offset, weight in LINE_CELLS)
+    for dx, dy in ((1, 0), (0, 1), (1, 1), (1, -1))
+)
 
 
 class PatternDetector:
@@ -11,135 +26,94 @@ class PatternDetector:
         self, x: int, y: int, player: int
     ) -> dict[str, int]:
         """Analyze a single move quickly"""
-        threats = {
-            "five": 0,
-            "open_four": 0,
-            "four": 0,
-            "open_three": 0,
-            "two": 0,
-        }
-
-        opponent = 3 - player
-        self.board.grid[y][x] = player
-
-        for dx, dy in self.directions:
-            count = 1
-            open_left = False
-            open_right = False
-
-            left_count = 0
-            i = 1
-            while True:
-                nx, ny = x - i * dx, y - i * dy
-                if not (0 <= nx < self.board.size and 0 <= ny < self.board.size):
-                    break
-                if self.board.grid[ny][nx] == player:
-                    left_count += 1
-                    i += 1
-                elif self.board.grid[ny][nx] == 0:
-                    open_left = True
-                    break
+        return unpack(self.analyze_packed(x, y, player))
+
+    def analyze_packed(self, x: int, y: int, player: int) -> int:
+        """Threat counts of a move as packed 4-bit fields (see pattern_table)"""
+        grid = self.board.grid
+        n = self.board.size
+        # no bounds checks for cells at least 4 away from every edge
+        inside = 4 <= x < n - 4 and 4 <= y < n - 4
+        packed = 0
+        for steps in DIRECTION_STEPS:
+            key = 0
+            for ox, oy, weight in steps:
+                nx = x + ox
+                ny = y + oy
+                if inside or (0 <= nx < n and 0 <= ny < n):
+                    cell = grid[ny][nx]
+                    if cell == player:
+                        key += weight
+                    elif cell:
+                        key += 2 * weight
                 else:
-                    break
-
-            right_count = 0
-            i = 1
-            while True:
-                nx, ny = x + i * dx, y + i * dy
-                if not (0 <= nx < self.board.size and 0 <= ny < self.board.size):
-                    break
-                if self.board.grid[ny][nx] == player:
-                    right_count += 1
-                    i += 1
-                elif self.board.grid[ny][nx] == 0:
-                    open_right = True
-                    break
-                else:
-                    break
-
-            count = 1 + left_count + right_count
-
-            if count >= 5:
-                threats["five"] += 1
-            elif count == 4:
-                if open_left and open_right:
-                    threats["open_four"] += 1
-                elif open_left or open_right:
-                    threats["four"] += 1
-            elif count == 3:
-                if open_left and open_right:
-                    threats["open_three"] += 1
-            elif count == 2:
-                if open_left or open_right:
-                    threats["two"] += 1
-
-            if count < 5:
-                gap_pattern = self._check_gap_pattern(x, y, dx, dy, player)
-                if gap_pattern == 4:
-                    threats["four"] += 1
-                elif gap_pattern == 3:
-                    threats["open_three"] += 1
-
-        self.board.grid[y][x] = 0
-        return threats
-
-    def _check_gap_pattern(self, x: int, y: int, dx: int, dy: int, player: int) -> int:
-        """Check for patterns with one gap like XX.X"""
-        for start in range(-4, 1):
-            stones = 0
-            gap_pos = -1
-            has_gap = False
-            blocked = 0
-
-            for i in range(5):
-                nx, ny = x + (start + i) * dx, y + (start + i) * dy
-                if not (0 <= nx < self.board.size and 0 <= ny < self.board.size):
-                    blocked += 1
-                    continue
-
-                cell = self.board.grid[ny][nx]
+                    key += 2 * weight
+            packed += THREAT_TABLE[key]
+        return packed
+
+    def _line_key(self, x: int, y: int, dx: int, dy: int, player: int) -> int:
+        """Base-3 code of the 8 cells around (x, y) along (dx, dy)"""
+        grid = self.board.grid
+        n = self.board.size
+        key = 0
+        for offset, weight in LINE_CELLS:
+            nx, ny = x + offset * dx, y + offset * dy
+            if 0 <= nx < n and 0 <= ny < n:
+                cell = grid[ny][nx]
                 if cell == player:
-                    stones += 1
-                elif cell == 0:
-                    if has_gap:
-                        break
-                    has_gap = True
-                    gap_pos = i
-                else:
-                    blocked += 1
-
-            if stones == 4 and has_gap and blocked == 0:
-                return 4
-            elif stones == 3 and has_gap and blocked == 0:
-                return 3
-
-        return 0
+                    key += weight
+                elif cell:
+                    key += 2 * weight
+            else:
+                key += 2 * weight
+        return key
 
     def find_critical_moves(self, player: int) -> list[tuple[int, int, int]]:
-        """Find critical moves with scores (faster)"""
-        moves = []
-        opponent = 3 - player
+        """The 15 best frontier cells as (x, y, score), best first.
+
+        Only one int is kept per scored cell; the tuples are built for the
+        selected cells alone.
+        """
+        grid = self.board.grid
+        n = self.board.size
+        ranked = []
+        for i in self.board.frontier:
+            x = i % n
+            y = i // n
+            mine = theirs = 0
+            inside = 4 <= x < n - 4 and 4 <= y < n - 4
+            for steps in DIRECTION_STEPS:
+                key_me = key_op = 0
+                for ox, oy, weight in steps:
+                    nx = x + ox
+                    ny = y + oy
+                    if inside or (0 <= nx < n and 0 <= ny < n):
+                        cell = grid[ny][nx]
+                        if cell == player:
+                            key_me += weight
+                            key_op += 2 * weight
+                        elif cell:
+                            key_me += 2 * weight
+                            key_op += weight
+                    else:
+                        key_me += 2 * weight
+                        key_op += 2 * weight
+                mine += SCORE_TABLE[key_me]
+                theirs += SCORE_TABLE[key_op]
+            score = mine * 2 + theirs
+            if score > 0:
+                ranked.append(score << CELL_BITS | (CELL_MASK - i))
 
-        for y in range(self.board.size):
-            for x in range(self.board.size):
-                if self.board.grid[y][x] != 0:
-                    continue
-
-                if not self._is_near_stone(x, y, 2):
-                    continue
-
-                my_score = self._quick_score(x, y, player)
-                opp_score = self._quick_score(x, y, opponent)
-
-                score = my_score * 2 + opp_score
-                if score > 0:
-                    moves.append((x, y, score))
-
-        moves.sort(key=lambda m: m[2], reverse=True)
-        return moves[:15]
+        moves = []
+        for key in nlargest(CRITICAL_MOVES, ranked):
+            i = CELL_MASK - (key & CELL_MASK)
+            moves.append((i % n, i // n, key >> CELL_BITS))
+        return moves
 
     def _is_near_stone(self, x: int, y: int, dist: int) -> bool:
         """Check if near any stone"""
+        if dist == 2:
+            return self.board.near[y * self.board.size + x] > 0
         for dy in range(-dist, dist + 1):
             for dx in range(-dist, dist + 1):
                 nx, ny = x + dx, y + dy
@@ -153,11 +127,7 @@ class PatternDetector:
 
     def _quick_score(self, x: int, y: int, player: int) -> int:
         """Quick scoring for move ordering"""
-        threats = self.analyze_move(x, y, player)
         score = 0
-        score += threats["five"] * 100000
-        score += threats["open_four"] * 10000
-        score += threats["four"] * 1000
-        score += threats["open_three"] * 500
-        score += threats["two"] * 10
-        return score
\ No newline at end of file
+        for dx, dy in self.directions:
+            score += SCORE_TABLE[self._line_key(x, y, dx, dy, player)]
+        return score
@@ -0,0 +1,89 @@
+from __future__ import annotations
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from typing import Callable
+
+
+MAGIC = b"PBTC"
+VERSION = 1
+# magic, version, fingerprint of the generator, table count, entries per
+# table, crc32 of the payload
+HEADER = struct.Struct("<4sHIHII")
+# every table is stored as 32-bit signed integers
+TYPECODE = "i" if array("i").itemsize == 4 else "l"
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tables.cache")
+
+
+def fingerprint(source: str) -> int:
+    """crc32 of the file generating the tables: editing it invalidates the cache"""
+    try:
+        with open(source, "rb") as f:
+            return zlib.crc32(f.read())
+    except OSError:
+        # frozen executables ship no sources, their tables never change
+        return 0
+
+
+def read(path: str, stamp: int, count: int, length: int) -> list[list[int]] | None:
+    """The tables stored in path, or None if it is missing, stale or damaged"""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if len(data) != HEADER.size + count * length * 4:
+                return None
+            magic, version, found, tables, entries, crc = HEADER.unpack_from(data)
+            if (magic, version, found, tables, entries) != (MAGIC, VERSION, stamp, count, length):
+                return None
+            payload = data[HEADER.size:]
+    except (OSError, ValueError):
+        return None
+    if zlib.crc32(payload) != crc:
+        return None
+    values = array(TYPECODE)
+    values.frombytes(payload)
+    # lists: indexing an array allocates a new int every time
+    return [values[i * length:(i + 1) * length].tolist() for i in range(count)]
+
+
+def write(path: str, stamp: int, tables: list[list[int]]) -> None:
+    """Store tables in path atomically; an unwritable directory is not an error"""
+    values = array(TYPECODE)
+    for table in tables:
+        values.extend(table)
+    payload = values.tobytes()
+    header = HEADER.pack(MAGIC, VERSION, stamp, len(tables), len(tables[0]), zlib.crc32(payload))
+    temp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp, "wb") as f:
+            f.write(header + payload)
+        os.replace(temp, path)
+    except OSError:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+
+
+def cached_tables(
+    source: str, build: Callable[[], tuple[list[int], ...]], count: int, length: int,
+    path: str | None = None,
+) -> tuple[list[int], ...]:
+    """The count tables of length entries build() returns, read from the
+    cache file when it is current, otherwise built and saved.
+
+    The file (PBRAIN_TABLES, default tables.cache next to the engine) is
+    checked against the generator's fingerprint, the table shape and a
+    checksum of its contents.
+    """
+    if path is None:
+        path = os.environ.get("PBRAIN_TABLES") or DEFAULT_PATH
+    stamp = fingerprint(source)
+    tables = read(path, stamp, count, length)
+    if tables is not None:
+        return tuple(tables)
+    tables = build()
+    write(path, stamp, list(tables))
+    return tables
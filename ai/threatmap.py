@@ -0,0 +1,82 @@
+from __future__ import annotations
+from game.board import Board
+from ai.patterns import PatternDetector
+
+
+DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+# a move's threats only depend on the cells up to 4 away on its lines
+REACH = 4
+
+
+class ThreatMap:
+    """Packed analyze_move results for every empty cell and both players.
+
+    Registered as a board watcher, it only remembers which cells differ
+    from the last refresh (a stone made and undone by a search cancels
+    out); refresh() then re-analyzes the cells on the four lines through
+    them.
+    Cells with no stone within reach on any line have no threats and are
+    never analyzed.
+    """
+
+    def __init__(self, board: Board):
+        self.board = board
+        self.detector = PatternDetector(board)
+        self.reset()
+        board.watchers.append(self)
+
+    def reset(self) -> None:
+        n = self.board.size
+        self.packed: list[list[int]] = [[], [0] * (n * n), [0] * (n * n)]
+        # empty cells with a threat for at least one player
+        self.active: set[int] = set()
+        # cell -> its value at the last refresh, for the cells that differ
+        self.changed: dict[int, int] = dict.fromkeys(self.board.stones[1] | self.board.stones[2], 0)
+
+    def on_set(self, x: int, y: int, old: int, new: int) -> None:
+        i = y * self.board.size + x
+        if i not in self.changed:
+            self.changed[i] = old
+        elif self.changed[i] == new:
+            del self.changed[i]
+
+    def _affected(self) -> set[int]:
+        n = self.board.size
+        cells = set()
+        for i in self.changed:
+            x, y = i % n, i // n
+            cells.add(i)
+            for dx, dy in DIRECTIONS:
+                for k in range(-REACH, REACH + 1):
+                    nx, ny = x + k * dx, y + k * dy
+                    if 0 <= nx < n and 0 <= ny < n:
+                        cells.add(ny * n + nx)
+        return cells
+
+    def refresh(self) -> None:
+        if not self.changed:
+            return
+        n = self.board.size
+        grid = self.board.grid
+        analyze = self.detector.analyze_packed
+        mine, theirs = self.packed[1], self.packed[2]
+        for i in self._affected():
+            x, y = i % n, i // n
+            if grid[y][x]:
+                mine[i] = theirs[i] = 0
+                self.active.discard(i)
+                continue
+            mine[i] = analyze(x, y, 1)
+            theirs[i] = analyze(x, y, 2)
+            if mine[i] or theirs[i]:
+                self.active.add(i)
+            else:
+                self.active.discard(i)
+        self.changed.clear()
+
+    def cells(self) -> list[tuple[int, int, int, int]]:
+        """(x, y, packed for player 1, packed for player 2), row-major"""
+        self.refresh()
+        n = self.board.size
+        mine, theirs = self.packed[1], self.packed[2]
+        return [(i % n, i // n, mine[i], theirs[i]) for i in sorted(self.active)]
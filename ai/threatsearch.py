@@ -0,0 +1,185 @@
+from __future__ import annotations
+import time
+from game.board import Board
+from ai.threatmap import ThreatMap
+from ai.pattern_table import (
+    FIELD_MASK,
+    FIVE_SHIFT,
+    FOUR_SHIFT,
+    OPEN_FOUR_SHIFT,
+    OPEN_THREE_SHIFT,
+)
+
+
+# attacker moves in one proof, so a VCF may be up to twice as many plies
+MAX_DEPTH = 10
+MAX_NODES = 5000
+# solved positions kept before the cache is dropped
+MAX_CACHE = 200000
+
+# disproof depth for positions the defender wins outright
+LOST = 1 << 30
+
+FIVE = FIELD_MASK << FIVE_SHIFT
+FOURS = (FIELD_MASK << OPEN_FOUR_SHIFT) | (FIELD_MASK << FOUR_SHIFT)
+THREES = FIELD_MASK << OPEN_THREE_SHIFT
+
+
+class SolverBudget(Exception):
+    """Raised when the node or time budget is spent"""
+
+
+class ThreatSolver:
+    """Victory by continuous fours (VCF) or threats (VCT).
+
+    Depth-first proof search on forcing lines only: the attacker plays
+    fours (and open threes for VCT), the defender only the replies that
+    stop them or its own fours. Proven wins and disproofs are cached by
+    Zobrist key across calls, budget cut-offs are not.
+    """
+
+    def __init__(self, max_depth: int = MAX_DEPTH, max_nodes: int = MAX_NODES):
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.wins: dict[tuple[int, int, bool], tuple[int, tuple[int, int]]] = {}
+        self.fails: dict[tuple[int, int, bool], int] = {}
+        self.nodes = 0
+        self.deadline: float | None = None
+
+    def clear(self) -> None:
+        self.wins.clear()
+        self.fails.clear()
+
+    def solve_vcf(
+        self, board: Board, attacker: int, deadline: float | None = None,
+        threats: ThreatMap | None = None,
+    ) -> tuple[int, int] | None:
+        return self._solve(board, attacker, False, deadline, threats)
+
+    def solve_vct(
+        self, board: Board, attacker: int, deadline: float | None = None,
+        threats: ThreatMap | None = None,
+    ) -> tuple[int, int] | None:
+        return self._solve(board, attacker, True, deadline, threats)
+
+    def _solve(
+        self, board: Board, attacker: int, vct: bool, deadline: float | None,
+        threats: ThreatMap | None,
+    ) -> tuple[int, int] | None:
+        """First move of the shortest forced win found within budget.
+
+        threats is the board's ThreatMap if it already has one, otherwise
+        a temporary one is attached for the duration of the call.
+        """
+        if len(self.wins) + len(self.fails) > MAX_CACHE:
+            self.clear()
+        self.nodes = 0
+        self.deadline = deadline
+        temporary = threats is None
+        if threats is None:
+            threats = ThreatMap(board)
+        root = len(board.history)
+        try:
+            for depth in range(1, self.max_depth + 1):
+                move = self._attack(board, threats, attacker, depth, vct)
+                if move is not None:
+                    return move
+        except SolverBudget:
+            while len(board.history) > root:
+                board.undo_move()
+        finally:
+            if temporary:
+                board.watchers.remove(threats)
+        return None
+
+    def _threats(
+        self, threats: ThreatMap, attacker: int
+    ) -> list[tuple[int, int, int, int]]:
+        """(x, y, attacker packed, defender packed) of threatened cells"""
+        cells = threats.cells()
+        if attacker == 1:
+            return cells
+        return [(x, y, theirs, mine) for x, y, mine, theirs in cells]
+
+    def _attack(
+        self, board: Board, threats: ThreatMap, attacker: int, depth: int, vct: bool
+    ) -> tuple[int, int] | None:
+        self.nodes += 1
+        if self.nodes > self.max_nodes or (
+            self.deadline is not None and time.perf_counter() >= self.deadline
+        ):
+            raise SolverBudget
+
+        key = (board.hash, attacker, vct)
+        won = self.wins.get(key)
+        if won is not None and won[0] <= depth:
+            return won[1]
+        if self.fails.get(key, 0) >= depth:
+            return None
+
+        cells = self._threats(threats, attacker)
+        for x, y, mine, _ in cells:
+            if mine & FIVE:
+                return (x, y)
+
+        blocks = [(x, y) for x, y, _, theirs in cells if theirs & FIVE]
+        if len(blocks) > 1:
+            self.fails[key] = LOST
+            return None
+        # while the defender has a three, only fours are forcing enough
+        three_allowed = vct and not any(theirs & FOURS for _, _, _, theirs in cells)
+        mask = FOURS | (THREES if three_allowed else 0)
+
+        candidates = [
+            (mine & FOURS, mine, x, y)
+            for x, y, mine, _ in cells
+            if mine & mask and (not blocks or (x, y) == blocks[0])
+        ]
+        candidates.sort(key=lambda c: (c[0] == 0, -c[1]))
+
+        for _, _, x, y in candidates:
+            board.make_move(x, y, attacker)
+            replies = self._defences(threats, attacker)
+            proven = replies is not None
+            if proven:
+                for rx, ry in replies:
+                    board.make_move(rx, ry, 3 - attacker)
+                    follow = None
+                    if not board.last_move_wins() and depth > 1:
+                        follow = self._attack(board, threats, attacker, depth - 1, vct)
+                    board.undo_move()
+                    if follow is None:
+                        proven = False
+                        break
+            board.undo_move()
+            if proven:
+                self.wins[key] = (depth, (x, y))
+                return (x, y)
+
+        self.fails[key] = depth
+        return None
+
+    def _defences(
+        self, threats: ThreatMap, attacker: int
+    ) -> list[tuple[int, int]] | None:
+        """Defender replies worth trying.
+
+        [] when the attacker can no longer be stopped, None when the
+        defender wins first or the last move was not forcing.
+        """
+        cells = self._threats(threats, attacker)
+        if any(theirs & FIVE for _, _, _, theirs in cells):
+            return None
+        fives = [(x, y) for x, y, mine, _ in cells if mine & FIVE]
+        if len(fives) >= 2:
+            return []
+        if fives:
+            return fives
+        # an open three: block the cells that would make it a four, or
+        # gain tempo with a four of our own
+        replies = [
+            (x, y)
+            for x, y, mine, theirs in cells
+            if mine & FOURS or theirs & FOURS
+        ]
+        return replies or None
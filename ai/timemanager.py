@@ -0,0 +1,62 @@
+from __future__ import annotations
+import time
+
+
+# used when the manager never sent timeout_turn / timeout_match
+DEFAULT_BUDGET = 1.0
+# floor so that at least a shallow search always runs
+MIN_BUDGET = 0.02
+# kept back for protocol I/O and interpreter jitter
+SAFETY_MARGIN = 0.1
+# share of timeout_turn we allow ourselves to use
+TURN_FRACTION = 0.8
+# expected number of our moves still to play when splitting time_left
+MOVES_TO_GO = 25
+
+
+class TimeManager:
+    """Per-move time budget from the INFO values the manager sends.
+
+    timeout_turn and timeout_match are in milliseconds, 0 meaning
+    "as fast as possible" and "no match limit" respectively; time_left
+    is the remaining match time.
+    """
+
+    def __init__(self, info: dict[str, str]):
+        self.info = info
+        self.started = time.perf_counter()
+        # perf_counter() time the pending command reached the process
+        # that queued it, when that was before it reached us
+        self.arrived: float | None = None
+
+    def _ms(self, key: str) -> int | None:
+        value = self.info.get(key)
+        if value is None or not value.strip().lstrip("-").isdigit():
+            return None
+        return int(value)
+
+    def start(self) -> None:
+        """Call as soon as the command that asks for a move is received"""
+        self.started = time.perf_counter() if self.arrived is None else self.arrived
+
+    def budget(self) -> float:
+        """Seconds we may spend on the current move"""
+        caps = []
+        turn = self._ms("timeout_turn")
+        if turn is not None:
+            caps.append(turn / 1000 * TURN_FRACTION - SAFETY_MARGIN)
+        match = self._ms("timeout_match")
+        left = self._ms("time_left")
+        if match is not None and match > 0:
+            remaining = left if left is not None else match
+            caps.append(remaining / 1000 / MOVES_TO_GO - SAFETY_MARGIN)
+        if not caps:
+            return DEFAULT_BUDGET
+        return max(min(caps), MIN_BUDGET)
+
+    def deadline(self) -> float:
+        """Absolute time.perf_counter() value the search must stop at"""
+        return self.started + self.budget()
+
+    def remaining(self) -> float:
+        return self.deadline() - time.perf_counter()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+DEFAULT_CAPACITY = 1 << 16
+
+# rough cost of one stored entry (tuple + ints + move tuple) in CPython
+ENTRY_BYTES = 200
+
+
+class TranspositionTable:
+    """Fixed-capacity two-tier table.
+
+    Each bucket has a depth-preferred slot, only replaced by a deeper
+    (or equally deep) search or by an entry from a newer search, and an
+    always-replace slot that keeps the most recent result.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.resize(capacity)
+
+    @classmethod
+    def from_memory(cls, max_memory: int) -> TranspositionTable:
+        return cls(cls.capacity_for(max_memory))
+
+    @staticmethod
+    def capacity_for(max_memory: int) -> int:
+        """Entries fitting in half of max_memory bytes (0 = no limit)"""
+        if max_memory <= 0:
+            return DEFAULT_CAPACITY
+        entries = max(max_memory // 2 // ENTRY_BYTES, 2)
+        return 1 << (entries.bit_length() - 1)
+
+    def resize(self, capacity: int) -> None:
+        buckets = max(capacity // 2, 1)
+        buckets = 1 << (buckets.bit_length() - 1)
+        self.capacity = buckets * 2
+        self.mask = buckets - 1
+        self.deep: list[tuple | None] = [None] * buckets
+        self.recent: list[tuple | None] = [None] * buckets
+        self.generation = 0
+
+    def clear(self) -> None:
+        self.resize(self.capacity)
+
+    def new_search(self) -> None:
+        """Age existing entries so stale deep ones can be replaced"""
+        self.generation = (self.generation + 1) & 0xFFFF
+
+    def probe(self, key: int) -> tuple[int, int, int, float, tuple[int, int] | None] | None:
+        """Return (key, depth, flag, score, move) for key, or None"""
+        i = key & self.mask
+        entry = self.deep[i]
+        if entry is not None and entry[0] == key:
+            return entry[:5]
+        entry = self.recent[i]
+        if entry is not None and entry[0] == key:
+            return entry[:5]
+        return None
+
+    def store(
+        self, key: int, depth: int, flag: int, score: float, move: tuple[int, int] | None
+    ) -> None:
+        i = key & self.mask
+        entry = (key, depth, flag, score, move, self.generation)
+        old = self.deep[i]
+        if old is None or old[0] == key or depth >= old[1] or old[5] != self.generation:
+            if old is not None and old[0] != key:
+                self.recent[i] = old
+            self.deep[i] = entry
+        else:
+            self.recent[i] = entry
+
+    def __len__(self) -> int:
+        return sum(e is not None for e in self.deep) + sum(e is not None for e in self.recent)
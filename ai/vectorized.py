@@ -0,0 +1,149 @@
+from __future__ import annotations
+from game.board import Board
+from ai.pattern_table import BLOCKED, OFFSETS, SCORE_TABLE, THREAT_TABLE, WEIGHTS
+
+try:
+    import numpy as np
+except ImportError:  # the engine itself never requires NumPy
+    np = None
+
+NUMPY_AVAILABLE = np is not None
+
+
+DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+# padding around the board so every offset of -4..4 is a plain slice
+PAD = 4
+
+if NUMPY_AVAILABLE:
+    RUN_VALUES = np.array([0, 0, 100, 1000, 10000, 100000], dtype=np.int64)
+    THREAT_ARRAY = np.array(THREAT_TABLE, dtype=np.int64)
+    SCORE_ARRAY = np.array(SCORE_TABLE, dtype=np.int64)
+
+
+def _require() -> None:
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("the vectorized backend needs NumPy")
+
+
+def to_array(board: Board) -> np.ndarray:
+    """The grid as a (size, size) uint8 array, indexed [y, x]"""
+    _require()
+    return np.array(board.grid, dtype=np.uint8)
+
+
+def _batch(boards) -> np.ndarray:
+    boards = np.asarray(boards, dtype=np.uint8)
+    if boards.ndim == 2:
+        boards = boards[None]
+    return boards
+
+
+def _shift(padded: np.ndarray, dx: int, dy: int, k: int, shape: tuple[int, int]) -> np.ndarray:
+    """View of the cells k steps along (dx, dy) from every board cell"""
+    y0 = PAD + k * dy
+    x0 = PAD + k * dx
+    return padded[..., y0:y0 + shape[0], x0:x0 + shape[1]]
+
+
+def _crop(boards: np.ndarray, margin: int) -> tuple[np.ndarray, int, int]:
+    """Smallest window holding every stone of the stack plus margin cells.
+
+    Returns the window and its (x, y) origin. Outside it the boards are
+    empty, so with a margin of 6 the 4-cell reach of every candidate
+    (2 cells from a stone) still lies inside the window or off-board.
+    """
+    occupied = boards.any(axis=0)
+    ys = np.flatnonzero(occupied.any(axis=1))
+    xs = np.flatnonzero(occupied.any(axis=0))
+    if not len(ys):
+        return boards[..., :0, :0], 0, 0
+    n = boards.shape[-1]
+    y0, y1 = max(ys[0] - margin, 0), min(ys[-1] + margin + 1, n)
+    x0, x1 = max(xs[0] - margin, 0), min(xs[-1] + margin + 1, n)
+    return boards[..., y0:y1, x0:x1], int(x0), int(y0)
+
+
+def evaluate_batch(boards, player: int) -> np.ndarray:
+    """MinimaxAI.evaluate_full for each board of an (N, size, size) stack"""
+    _require()
+    boards, _, _ = _crop(_batch(boards), 0)
+    total = np.zeros(boards.shape[0], dtype=np.int64)
+    for owner, sign in ((player, 1), (3 - player, -1)):
+        own = boards == owner
+        padded = np.pad(own, ((0, 0), (PAD, PAD), (PAD, PAD)))
+        for dx, dy in DIRECTIONS:
+            length = np.ones(own.shape, dtype=np.int64)
+            for side in (-1, 1):
+                run = np.ones(own.shape, dtype=bool)
+                for k in range(1, 5):
+                    run &= _shift(padded, dx, dy, side * k, own.shape[-2:])
+                    length += run
+            values = RUN_VALUES[np.minimum(length, 5)] * own
+            total += sign * values.sum(axis=(1, 2))
+    return total
+
+
+def evaluate(board: Board, player: int) -> int:
+    return int(evaluate_batch(to_array(board), player)[0])
+
+
+def _line_keys(boards: np.ndarray, player: int) -> list[np.ndarray]:
+    """Base-3 pattern_table keys of every cell, one array per direction"""
+    states = np.where(boards == player, 1, np.where(boards == 0, 0, BLOCKED))
+    padded = np.pad(
+        states.astype(np.int32), ((0, 0), (PAD, PAD), (PAD, PAD)), constant_values=BLOCKED
+    )
+    keys = []
+    for dx, dy in DIRECTIONS:
+        key = np.zeros(boards.shape, dtype=np.int32)
+        for offset, weight in zip(OFFSETS, WEIGHTS):
+            key += _shift(padded, dx, dy, offset, boards.shape[-2:]) * weight
+        keys.append(key)
+    return keys
+
+
+def analyze_batch(boards, player: int) -> np.ndarray:
+    """Packed analyze_move threats of every empty cell (0 on stones)"""
+    _require()
+    boards = _batch(boards)
+    packed = sum(THREAT_ARRAY[key] for key in _line_keys(boards, player))
+    return np.where(boards == 0, packed, 0)
+
+
+def quick_scores(boards, player: int) -> np.ndarray:
+    """PatternDetector._quick_score of every empty cell (0 on stones)"""
+    _require()
+    boards = _batch(boards)
+    scores = sum(SCORE_ARRAY[key] for key in _line_keys(boards, player))
+    return np.where(boards == 0, scores, 0)
+
+
+def _near_stones(occupied: np.ndarray, dist: int = 2) -> np.ndarray:
+    h, w = occupied.shape[-2:]
+    padded = np.pad(occupied, ((0, 0), (PAD, PAD), (PAD, PAD)))
+    near = np.zeros(occupied.shape, dtype=bool)
+    for dy in range(-dist, dist + 1):
+        for dx in range(-dist, dist + 1):
+            near |= padded[..., PAD + dy:PAD + dy + h, PAD + dx:PAD + dx + w]
+    return near
+
+
+def find_critical_moves(board: Board, player: int, limit: int = 15) -> list[tuple[int, int, int]]:
+    """PatternDetector.find_critical_moves computed on whole arrays.
+
+    Only the box around the stones is copied out of the grid, so the
+    cost follows the stones rather than the board size.
+    """
+    _require()
+    box = board.bounds(PAD + 2)
+    if box is None:
+        return []
+    x0, y0, x1, y1 = box
+    boards = np.array([row[x0:x1 + 1] for row in board.grid[y0:y1 + 1]], dtype=np.uint8)[None]
+    score = 2 * quick_scores(boards, player)[0] + quick_scores(boards, 3 - player)[0]
+    empty = boards[0] == 0
+    mask = empty & _near_stones(~empty[None])[0] & (score > 0)
+    ys, xs = np.nonzero(mask)
+    values = score[ys, xs]
+    order = np.argsort(-values, kind="stable")[:limit]
+    return [(int(xs[i]) + x0, int(ys[i]) + y0, int(values[i])) for i in order]
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Memory allocated and garbage collector work of the move generator and search.
+
+    python benchmarks/allocations.py [--depth 3] [--category midgame tactical]
+
+For each corpus position, find_critical_moves and a fixed-depth search
+run under tracemalloc. Reported per call or search: the time, the
+tracemalloc peak (temporaries included, as they are allocated before
+being freed) and the number and total duration of collections by the
+cyclic garbage collector, which allocations of tuples, lists and
+dicts trigger.
+"""
+import argparse
+import gc
+import sys
+import os
+import time
+import tracemalloc
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ai.minimax import MinimaxAI
+from ai.patterns import PatternDetector
+from run import CORPUS, build, load_corpus, to_move
+
+
+class GCTimer:
+    """Collections and time spent in them, through gc.callbacks"""
+
+    def __init__(self):
+        self.collections = 0
+        self.seconds = 0.0
+        self._start = 0.0
+
+    def __call__(self, phase: str, info: dict) -> None:
+        if phase == "start":
+            self._start = time.perf_counter()
+        else:
+            self.collections += 1
+            self.seconds += time.perf_counter() - self._start
+
+
+def traced_peak(fn) -> int:
+    """Most memory fn had allocated at once, in bytes"""
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def measure(name: str, calls: list, repeat: int) -> dict:
+    timer = GCTimer()
+    gc.collect()
+    gc.callbacks.append(timer)
+    start = time.perf_counter()
+    try:
+        for _ in range(repeat):
+            for fn in calls:
+                fn()
+    finally:
+        gc.callbacks.remove(timer)
+    elapsed = time.perf_counter() - start
+    peaks = [traced_peak(fn) for fn in calls]
+    count = repeat * len(calls)
+    return {
+        "name": name,
+        "ms": elapsed / count * 1000,
+        "peak_kb": max(peaks) / 1024,
+        "gc": timer.collections / count,
+        "gc_ms": timer.seconds / count * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--category", nargs="+")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20, help="find_critical_moves rounds")
+    args = parser.parse_args()
+
+    _, positions = load_corpus(args.corpus, args.category)
+    boards = [build(p, "grid") for p in positions]
+
+    def critical(board):
+        detector = PatternDetector(board)
+        player = to_move(board)
+        return lambda: detector.find_critical_moves(player)
+
+    def search(board):
+        def run():
+            ai = MinimaxAI(depth=args.depth)
+            ai.find_best_move(board, to_move(board))
+        return run
+
+    rows = [
+        measure("find_critical_moves", [critical(b) for b in boards], args.repeat),
+        measure(f"find_best_move/d{args.depth}", [search(b) for b in boards], 1),
+    ]
+    print(f"{'':<22}{'ms/call':>10}{'peak KB':>10}{'GCs/call':>10}{'GC ms/call':>12}")
+    for row in rows:
+        print(f"{row['name']:<22}{row['ms']:>10.3f}{row['peak_kb']:>10.1f}{row['gc']:>10.2f}{row['gc_ms']:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Cost of the same position on 20x20, 50x50 and 100x100 boards.
+
+    python benchmarks/board_size.py [--stones 10 30] [--repeat 5]
+
+The stones of a seeded midgame are placed around the center of each
+board; with stone-proportional scans the columns should barely differ.
+"""
+import argparse
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ai.evaluator import IncrementalEvaluator
+from ai.minimax import MinimaxAI
+from ai.patterns import PatternDetector
+from ai.threatmap import ThreatMap
+from game.board import Board
+from make_corpus import playout
+from protocol.handler import ProtocolHandler
+
+SIZES = (20, 50, 100)
+
+
+def centered(stones: list[list[int]], size: int) -> list[tuple[int, int, int]]:
+    shift = (size - 20) // 2
+    return [(x + shift, y + shift, p) for x, y, p in stones]
+
+
+def best_of(repeat: int, fn) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def turn(size: int, stones: list[tuple[int, int, int]]) -> None:
+    handler = ProtocolHandler(ponder=False)
+    handler.process(f"START {size}")
+    handler.process("INFO timeout_turn 200")
+    # the engine is player 1, the last stone is the opponent's move
+    flip = stones[-1][2] == 1
+    stones = [(x, y, 3 - p if flip else p) for x, y, p in stones]
+    for x, y, p in stones[:-1]:
+        handler.board.make_move(x, y, p)
+    x, y, _ = stones[-1]
+    handler.process(f"TURN {x},{y}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stones", type=int, nargs="+", default=[10, 30])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for count in args.stones:
+        base = playout(20, count, seed=count)
+        boards = {}
+        for size in SIZES:
+            board = Board(size)
+            for x, y, p in centered(base, size):
+                board.make_move(x, y, p)
+            boards[size] = board
+        ai = MinimaxAI()
+        rows = [
+            ("check_win", lambda b: b.check_win(1)),
+            ("check_win_in_1", lambda b: b.check_win_in_1(1)),
+            ("check_win_in_2", lambda b: b.check_win_in_2(1)),
+            ("evaluate_full", lambda b: ai.evaluate_full(b, 1)),
+            ("evaluator attach", lambda b: IncrementalEvaluator(b).board.watchers.pop()),
+            ("threat map", lambda b: ThreatMap(b).cells() and b.watchers.pop()),
+            ("find_critical_moves", lambda b: PatternDetector(b).find_critical_moves(1)),
+            ("TURN (200 ms budget)", None),
+        ]
+        print(f"{len(base)} stones" + "".join(f"{size:>10}x{size:<3}" for size in SIZES) + "   (ms)")
+        for name, fn in rows:
+            cells = []
+            for size in SIZES:
+                if fn is None:
+                    stones = centered(base, size)
+                    t = best_of(args.repeat, lambda: turn(size, stones))
+                else:
+                    board = boards[size]
+                    t = best_of(args.repeat, lambda: fn(board))
+                cells.append(f"{t * 1000:>14.3f}")
+            print(f"  {name:<22}" + "".join(cells))
+
+
+if __name__ == "__main__":
+    main()
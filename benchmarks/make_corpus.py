@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Regenerate the benchmark corpus (deterministic, seeded).
+
+    python benchmarks/make_corpus.py > benchmarks/corpus/positions-v1.json
+
+Bump the file version whenever the generated positions change, so that
+results measured on different corpora are never compared.
+"""
+import json
+import random
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ai.patterns import PatternDetector
+from game.board import Board
+
+
+CORPUS_VERSION = 1
+
+
+def playout(size: int, stones: int, seed: int, spread: int = 3) -> list[list[int]]:
+    """Plausible position: mostly top-ranked moves with some randomness"""
+    rng = random.Random(seed)
+    board = Board(size)
+    c = size // 2
+    board.make_move(c + rng.randint(-1, 1), c + rng.randint(-1, 1), 1)
+    detector = PatternDetector(board)
+    while len(board.history) < stones:
+        player = 1 + len(board.history) % 2
+        moves = detector.find_critical_moves(player)[:spread]
+        if not moves:
+            break
+        x, y, _ = rng.choice(moves)
+        board.make_move(x, y, player)
+        if board.last_move_wins():
+            board.undo_move()
+            break
+    return [list(m) for m in board.history]
+
+
+TACTICAL = [
+    ("open-four-to-win", 20, [[5, 5, 1], [6, 5, 1], [7, 5, 1], [8, 5, 1], [5, 6, 2], [6, 7, 2], [9, 9, 2]]),
+    ("block-four", 20, [[10, 10, 2], [11, 10, 2], [12, 10, 2], [13, 10, 2], [9, 9, 1], [10, 11, 1], [15, 15, 1]]),
+    ("broken-three", 20, [[4, 4, 1], [5, 4, 1], [7, 4, 1], [8, 8, 2], [9, 9, 2]]),
+    ("double-four", 20, [[4, 5, 2], [5, 5, 1], [6, 5, 1], [7, 5, 1], [8, 6, 1], [8, 7, 1], [8, 8, 1], [8, 9, 2], [12, 12, 2]]),
+    ("vcf-two-steps", 20, [[3, 5, 2], [4, 5, 1], [5, 5, 1], [6, 5, 1], [8, 6, 1], [8, 7, 1], [8, 9, 2], [12, 12, 2], [13, 12, 2]]),
+    ("double-three", 20, [[8, 9, 1], [9, 9, 1], [10, 10, 1], [10, 11, 1], [2, 2, 2], [15, 15, 2], [14, 15, 2], [3, 3, 2]]),
+]
+
+
+def main() -> None:
+    positions = []
+    for i in range(6):
+        positions.append({"id": f"opening-{i}", "category": "opening", "size": 20,
+                          "stones": playout(20, 4 + i, seed=100 + i)})
+    for i in range(8):
+        positions.append({"id": f"midgame-{i}", "category": "midgame", "size": 20,
+                          "stones": playout(20, 20 + 3 * i, seed=200 + i)})
+    for name, size, stones in TACTICAL:
+        positions.append({"id": f"tactical-{name}", "category": "tactical", "size": size,
+                          "stones": stones})
+    for size in (50, 100):
+        for i, count in enumerate((10, 30)):
+            positions.append({"id": f"large-{size}-{i}", "category": "large", "size": size,
+                              "stones": playout(size, count, seed=300 + size + i)})
+    json.dump({"version": CORPUS_VERSION, "positions": positions}, sys.stdout, indent=1)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
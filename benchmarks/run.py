@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""Timing suite over the fixed position corpus.
+
+    python benchmarks/run.py -o results.json
+    python benchmarks/run.py --compare baseline.json [--threshold 0.1]
+
+Every benchmark runs over the positions of benchmarks/corpus and reports
+per-call p50/p95/p99 in milliseconds (searches also report nodes/sec).
+With --compare, a benchmark whose p50 or p95 grew, or whose nodes/sec
+dropped, by more than the threshold is flagged and the exit status is 1.
+Results are only comparable on the same corpus version and machine.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ai.minimax import MinimaxAI
+from ai.patterns import PatternDetector
+from game.board import Board
+from protocol.handler import BOARD_ENGINES, ProtocolHandler
+
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "positions-v1.json")
+SEARCH_DEPTHS = (1, 2, 3)
+# INFO timeout_turn sent before the timed TURN commands
+TURN_TIMEOUT_MS = 300
+
+
+def load_corpus(path: str, categories: list[str] | None = None) -> tuple[int, list[dict]]:
+    with open(path) as f:
+        data = json.load(f)
+    positions = data["positions"]
+    if categories:
+        positions = [p for p in positions if p["category"] in categories]
+    return data["version"], positions
+
+
+def build(position: dict, engine: str) -> Board:
+    board = BOARD_ENGINES[engine](position["size"])
+    for x, y, player in position["stones"]:
+        board.make_move(x, y, player)
+    return board
+
+
+def to_move(board: Board) -> int:
+    return 1 + len(board.history) % 2
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Nearest-rank percentile of sorted samples"""
+    rank = max(1, -(-len(samples) * q // 100))
+    return samples[int(rank) - 1]
+
+
+def summarize(samples: list[float], nodes: int | None = None) -> dict:
+    samples = sorted(samples)
+    result = {
+        "samples": len(samples),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "mean_ms": sum(samples) / len(samples) * 1000,
+    }
+    if nodes is not None:
+        result["nodes"] = nodes
+        result["nodes_per_sec"] = nodes / sum(samples) if sum(samples) else 0.0
+    return result
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def sample(fn, repeat: int) -> list[float]:
+    """repeat timings of fn after one untimed warm-up call"""
+    fn()
+    return [timed(fn) for _ in range(repeat)]
+
+
+def bench_check_win(positions, engine, repeat):
+    samples = []
+    for position in positions:
+        board = build(position, engine)
+        samples += sample(lambda: (board.check_win(1), board.check_win(2)), repeat)
+    return summarize(samples)
+
+
+def bench_analyze_move(positions, engine, repeat):
+    """One sample is analyze_move for both players on every frontier cell"""
+    samples = []
+    for position in positions:
+        board = build(position, engine)
+        detector = PatternDetector(board)
+        cells = [(i % board.size, i // board.size) for i in sorted(board.frontier)]
+
+        def run():
+            for x, y in cells:
+                detector.analyze_move(x, y, 1)
+                detector.analyze_move(x, y, 2)
+        samples += sample(run, repeat)
+    return summarize(samples)
+
+
+def bench_critical_moves(positions, engine, repeat, backend):
+    samples = []
+    for position in positions:
+        board = build(position, engine)
+        ai = MinimaxAI(backend=backend)
+        player = to_move(board)
+        samples += sample(lambda: ai.critical_moves(board, player), repeat)
+    return summarize(samples)
+
+
+def bench_evaluate(positions, engine, repeat):
+    """make_move, evaluate, undo_move over the candidate moves, as in the search"""
+    samples = []
+    for position in positions:
+        board = build(position, engine)
+        ai = MinimaxAI()
+        player = to_move(board)
+        moves = [(x, y) for x, y, _ in PatternDetector(board).find_critical_moves(player)]
+
+        def run():
+            for x, y in moves:
+                board.make_move(x, y, player)
+                ai.evaluate(board, player)
+                board.undo_move()
+        samples += [t / max(len(moves), 1) for t in sample(run, repeat)]
+    return summarize(samples)
+
+
+def bench_search(positions, engine, depth, backend):
+    """Fixed-depth iterative deepening on a fresh engine per position"""
+    samples, nodes = [], 0
+    for position in positions:
+        board = build(position, engine)
+        ai = MinimaxAI(depth, backend=backend)
+        samples.append(timed(lambda: ai.find_best_move(board, to_move(board))))
+        nodes += ai.nodes
+    return summarize(samples, nodes)
+
+
+def bench_turn(positions, engine, repeat, timeout_ms):
+    """Protocol TURN latency, the last stone of each position being the opponent's"""
+    samples = []
+    for position in positions:
+        stones = position["stones"]
+        if not stones:
+            continue
+        # recolour so that the engine is player 1 and the last stone is the opponent's
+        flip = stones[-1][2] == 1
+        stones = [(x, y, 3 - p if flip else p) for x, y, p in stones]
+        *setup, (ox, oy, _) = stones
+        for _ in range(repeat):
+            handler = ProtocolHandler(board_engine=engine, ponder=False)
+            handler.process(f"START {position['size']}")
+            handler.process(f"INFO timeout_turn {timeout_ms}")
+            for x, y, p in setup:
+                handler.board.make_move(x, y, p)
+            samples.append(timed(lambda: handler.process(f"TURN {ox},{oy}")))
+            handler.process("END")
+    return summarize(samples)
+
+
+def git_revision() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run(args) -> dict:
+    version, positions = load_corpus(args.corpus, args.category)
+    engine, repeat = args.engine, args.repeat
+    benches = {
+        "check_win": lambda: bench_check_win(positions, engine, repeat),
+        "analyze_move": lambda: bench_analyze_move(positions, engine, repeat),
+        "find_critical_moves": lambda: bench_critical_moves(positions, engine, repeat, args.backend),
+        "evaluate": lambda: bench_evaluate(positions, engine, repeat),
+    }
+    for depth in args.depths:
+        benches[f"find_best_move/d{depth}"] = (
+            lambda depth=depth: bench_search(positions, engine, depth, args.backend)
+        )
+    if not args.no_turn:
+        benches["turn_latency"] = lambda: bench_turn(positions, engine, 1, args.turn_ms)
+
+    results = {}
+    for name, bench in benches.items():
+        if args.only and not any(name.startswith(o) for o in args.only):
+            continue
+        results[name] = bench()
+        print(f"{name:<22} {format_row(results[name])}", file=sys.stderr)
+    return {
+        "meta": {
+            "corpus_version": version,
+            "positions": len(positions),
+            "engine": engine,
+            "backend": args.backend,
+            "repeat": repeat,
+            "turn_timeout_ms": args.turn_ms,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "revision": git_revision(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def format_row(result: dict) -> str:
+    row = f"p50 {result['p50_ms']:9.3f}  p95 {result['p95_ms']:9.3f}  p99 {result['p99_ms']:9.3f} ms"
+    if "nodes_per_sec" in result:
+        row += f"  {result['nodes_per_sec']:10.0f} nodes/s"
+    return row
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Names of the benchmarks that regressed by more than threshold"""
+    if current["meta"]["corpus_version"] != baseline["meta"]["corpus_version"]:
+        raise SystemExit("baseline was measured on another corpus version")
+    regressions = []
+    print(f"{'benchmark':<22} {'metric':<14} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        metrics = [("p50_ms", False), ("p95_ms", False)]
+        if "nodes_per_sec" in result and "nodes_per_sec" in base:
+            metrics.append(("nodes_per_sec", True))
+        for metric, higher_is_better in metrics:
+            old, new = base[metric], result[metric]
+            if not old:
+                continue
+            change = new / old - 1
+            worse = -change if higher_is_better else change
+            flag = "  REGRESSION" if worse > threshold else ""
+            print(f"{name:<22} {metric:<14} {old:>12.3f} {new:>12.3f} {change:>+7.1%}{flag}")
+            if flag and name not in regressions:
+                regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--category", action="append", help="only positions of this category (repeatable)")
+    parser.add_argument("--only", action="append", help="only benchmarks with this name prefix (repeatable)")
+    parser.add_argument("--engine", choices=sorted(BOARD_ENGINES), default="grid")
+    parser.add_argument("--backend", choices=("python", "numpy"), default="python")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per position for the cheap benchmarks")
+    parser.add_argument("--depths", type=int, nargs="+", default=list(SEARCH_DEPTHS))
+    parser.add_argument("--turn-ms", type=int, default=TURN_TIMEOUT_MS)
+    parser.add_argument("--no-turn", action="store_true", help="skip the protocol TURN latency")
+    parser.add_argument("-o", "--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against this results file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="tolerated relative slowdown")
+    args = parser.parse_args()
+
+    results = run(args)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    elif not args.compare:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"regressed: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Games per second: one engine process per game against one shared server.
+
+    python benchmarks/server.py [--games 16] [--concurrency 4] [--turn-ms 50]
+
+Both modes play the same openings through tools/arena.py; only the
+engine command changes (the executable, or a unix:// session on
+protocol/server.py with its default worker count, one per CPU).
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tools")))
+from arena import DEFAULT_ENGINE, GRACE_MS, ROOT, parse_engine, play_game, random_opening
+
+
+def run(
+    engine: str, games: int, concurrency: int, size: int, turn_ms: int, seed: int
+) -> tuple[float, dict, list[float]]:
+    """Seconds, game endings and the time of every move in ms"""
+    engines = [parse_engine("a=" + engine), parse_engine("b=" + engine)]
+    rng = random.Random(seed)
+    openings = [random_opening(size, 3, rng) for _ in range(games)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        records = list(pool.map(
+            lambda i: play_game(i, engines, i % 2, openings[i], size, turn_ms, 0, GRACE_MS),
+            range(games),
+        ))
+    elapsed = time.perf_counter() - start
+    results: dict[str, int] = {}
+    moves: list[float] = []
+    for record in records:
+        results[record["reason"]] = results.get(record["reason"], 0) + 1
+        for times in record["times"].values():
+            moves.extend(times)
+    return elapsed, results, moves
+
+
+def report(name: str, games: int, turn_ms: int, elapsed: float, results: dict, moves: list[float]) -> None:
+    over = sum(1 for ms in moves if ms > turn_ms)
+    print(f"{name:<18}{games / elapsed:6.2f} games/s  ({elapsed:.1f}s)  slowest move {max(moves):.0f} ms, "
+          f"{over}/{len(moves)} over turn-ms  {results}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--size", type=int, default=20)
+    parser.add_argument("--turn-ms", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    common = (args.games, args.concurrency, args.size, args.turn_ms, args.seed)
+
+    report("process per game", args.games, args.turn_ms, *run(f"{sys.executable} {DEFAULT_ENGINE}", *common))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "pbrain.sock")
+        # each game has two sessions, one per side: with more sessions
+        # than CPUs they share workers and queue for them
+        server = subprocess.Popen([sys.executable, "-m", "protocol.server", "--unix", path], cwd=ROOT)
+        try:
+            while not os.path.exists(path):
+                time.sleep(0.05)
+            shared = run("unix://" + path, *common)
+        finally:
+            server.terminate()
+            server.wait()
+    report("shared server", args.games, args.turn_ms, *shared)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Time from launching the engine to its answers to START and BEGIN.
+
+    python benchmarks/startup.py [--runs 10] [--size 20]
+
+Measured as the manager sees it, from process creation to the reply
+line, with the table cache in place (warm) and with a missing cache
+file (cold: the pattern tables are built, then saved). A bare
+interpreter start is shown for reference.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tools")))
+from arena import DEFAULT_ENGINE, ROOT
+
+
+def launch(size: int, env: dict[str, str]) -> tuple[float, float]:
+    """Seconds until OK after START, then until the BEGIN move"""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, DEFAULT_ENGINE], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        cwd=ROOT, env={**os.environ, **env}, text=True,
+    )
+    proc.stdin.write(f"START {size}\n")
+    proc.stdin.flush()
+    if proc.stdout.readline().strip() != "OK":
+        raise SystemExit("START refused")
+    ready = time.perf_counter()
+    proc.stdin.write("BEGIN\n")
+    proc.stdin.flush()
+    proc.stdout.readline()
+    moved = time.perf_counter()
+    proc.stdin.write("END\n")
+    proc.stdin.flush()
+    proc.wait()
+    return ready - start, moved - start
+
+
+def interpreter() -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - start
+
+
+def median(samples: list[float]) -> float:
+    samples = sorted(samples)
+    return samples[len(samples) // 2]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--size", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'':<22}{'START ms':>10}{'BEGIN ms':>10}   (median of {args.runs})")
+    python = median([interpreter() for _ in range(args.runs)])
+    print(f"{'python -c pass':<22}{python * 1000:>10.1f}")
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = {"warm cache": [], "cold cache": []}
+        cache = os.path.join(tmp, "tables.cache")
+        launch(args.size, {"PBRAIN_TABLES": cache})
+        for run in range(args.runs):
+            rows["warm cache"].append(launch(args.size, {"PBRAIN_TABLES": cache}))
+            cold = os.path.join(tmp, f"cold-{run}.cache")
+            rows["cold cache"].append(launch(args.size, {"PBRAIN_TABLES": cold}))
+        for name, samples in rows.items():
+            ready = median([s[0] for s in samples])
+            moved = median([s[1] for s in samples])
+            print(f"{name:<22}{ready * 1000:>10.1f}{moved * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Pure-Python against NumPy evaluation on 20x20 and 100x100 boards.
+
+    python benchmarks/vectorized.py [--batch 256] [--repeat 5]
+"""
+import argparse
+import random
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ai import vectorized
+from ai.minimax import MinimaxAI
+from ai.patterns import PatternDetector
+from game.board import Board
+
+
+def random_board(size: int, stones: int, rng: random.Random) -> Board:
+    board = Board(size)
+    c = size // 2
+    spread = max(4, int(stones ** 0.5))
+    placed = 0
+    while placed < stones:
+        x = min(max(c + rng.randint(-spread, spread), 0), size - 1)
+        y = min(max(c + rng.randint(-spread, spread), 0), size - 1)
+        if board.place_stone(x, y, 1 + placed % 2):
+            placed += 1
+    return board
+
+
+def best_of(repeat: int, fn) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if not vectorized.NUMPY_AVAILABLE:
+        sys.exit("NumPy is not installed")
+
+    ai = MinimaxAI()
+    rng = random.Random(0)
+    print(f"{'size':>5} {'operation':<22} {'python ms':>10} {'numpy ms':>10} {'speedup':>8}")
+    for size in (20, 100):
+        boards = [random_board(size, 40, rng) for _ in range(args.batch)]
+        board = boards[0]
+        stack = vectorized.np.stack([vectorized.to_array(b) for b in boards])
+        rows = [
+            ("evaluate",
+             lambda: ai.evaluate_full(board, 1),
+             lambda: vectorized.evaluate(board, 1)),
+            ("find_critical_moves",
+             lambda: PatternDetector(board).find_critical_moves(1),
+             lambda: vectorized.find_critical_moves(board, 1)),
+            (f"evaluate x{args.batch}",
+             lambda: [ai.evaluate_full(b, 1) for b in boards],
+             lambda: vectorized.evaluate_batch(stack, 1)),
+        ]
+        for name, python, numpy in rows:
+            tp = best_of(args.repeat, python)
+            tn = best_of(args.repeat, numpy)
+            print(f"{size:>5} {name:<22} {tp * 1000:>10.2f} {tn * 1000:>10.2f} {tp / tn:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+from game.board import Board
+
+
+_LAYOUTS: dict[int, tuple[int, int, tuple[int, ...], tuple[int, ...]]] = {}
+
+
+def _layout(size: int) -> tuple[int, int, tuple[int, ...], tuple[int, ...]]:
+    """Padded layout shared by every bitboard of the same size.
+
+    Rows are stored with one always-empty guard column (stride = size + 1)
+    so a shift along any direction can never wrap onto the next row.
+    """
+    cached = _LAYOUTS.get(size)
+    if cached is not None:
+        return cached
+    stride = size + 1
+    row = (1 << size) - 1
+    full = 0
+    for y in range(size):
+        full |= row << (y * stride)
+    # shifts for (1, 0), (0, 1), (1, 1), (1, -1), same order as Board
+    lines = (1, stride, stride + 1, -(stride - 1))
+    ring = (1, stride, stride + 1, stride - 1)
+    cached = (stride, full, lines, ring)
+    _LAYOUTS[size] = cached
+    return cached
+
+
+class BitBoard(Board):
+    """Board keeping one Python-int bitboard per player next to the grid.
+
+    The grid is kept in sync so code reading ``grid[y][x]`` keeps working,
+    line queries (wins, neighbours) use shift-and-AND on the bitboards.
+    """
+
+    def __init__(self, size: int = 20):
+        self.stride, self.full, self.line_shifts, self.ring_shifts = _layout(size)
+        self.bits = [0, 0, 0]
+        super().__init__(size)
+
+    def clear(self) -> None:
+        self.bits = [0, 0, 0]
+        super().clear()
+
+    def _set(self, x: int, y: int, player: int) -> None:
+        bit = 1 << (y * self.stride + x)
+        old = self.grid[y][x]
+        if old:
+            self.bits[old] &= ~bit
+        if player:
+            self.bits[player] |= bit
+        super()._set(x, y, player)
+
+    def occupied(self) -> int:
+        return self.bits[1] | self.bits[2]
+
+    def neighbours(self, mask: int, dist: int = 1) -> int:
+        """Cells within ``dist`` (king moves) of ``mask``, stones included"""
+        full = self.full
+        for _ in range(dist):
+            grown = mask
+            for s in self.ring_shifts:
+                grown |= (mask << s) | (mask >> s)
+            mask = grown & full
+        return mask
+
+    def count_consecutive(self, x: int, y: int, dx: int, dy: int, player: int) -> int:
+        return self._run(self.bits[player], y * self.stride + x, dx + dy * self.stride)
+
+    def _run(self, b: int, idx: int, step: int) -> int:
+        count = 0
+        i = idx + step
+        while i >= 0 and (b >> i) & 1:
+            count += 1
+            i += step
+        return count
+
+    def check_win(self, player: int) -> bool:
+        b = self.bits[player]
+        for s in self.line_shifts:
+            if s < 0:
+                s = -s
+                m = b & (b << s)
+                m &= m << (2 * s)
+                if m & (b << (4 * s)):
+                    return True
+            else:
+                m = b & (b >> s)
+                m &= m >> (2 * s)
+                if m & (b >> (4 * s)):
+                    return True
+        return False
+
+    def _iter_cells(self, mask: int):
+        stride = self.stride
+        while mask:
+            low = mask & -mask
+            idx = low.bit_length() - 1
+            mask ^= low
+            yield idx, idx % stride, idx // stride
+
+    def check_win_in_1(self, player: int) -> list[tuple[int, int]]:
+        b = self.bits[player]
+        stride = self.stride
+        steps = (1, stride, stride + 1, 1 - stride)
+        cand = self.neighbours(b) & self.full & ~self.occupied()
+        moves = []
+        for idx, x, y in self._iter_cells(cand):
+            for step in steps:
+                if 1 + self._run(b, idx, step) + self._run(b, idx, -step) >= 5:
+                    moves.append((x, y))
+                    break
+        return moves
+
+    def check_win_in_2(self, player: int) -> list[tuple[int, int]]:
+        b = self.bits[player]
+        stride = self.stride
+        steps = (1, stride, stride + 1, 1 - stride)
+        free = self.full & ~self.occupied()
+        moves = []
+        for idx, x, y in self._iter_cells(self.neighbours(b) & free):
+            for step in steps:
+                left = self._run(b, idx, -step)
+                right = self._run(b, idx, step)
+                if 1 + left + right < 3:
+                    continue
+                li = idx - (left + 1) * step
+                ri = idx + (right + 1) * step
+                if (li >= 0 and (free >> li) & 1) or (ri >= 0 and (free >> ri) & 1):
+                    moves.append((x, y))
+                    break
+        return moves
@@ -1,11 +1,38 @@
 
+from __future__ import annotations
+from game.zobrist import zobrist_table
+
+
 class Board:
     def __init__(self, size: int = 20):
         self.size = size
+        self.zobrist = zobrist_table(size)
+        self.hash = 0
         self.grid: list[list[int]] = [[0 for _ in range(size)] for _ in range(size)]
+        self.history: list[tuple[int, int, int]] = []
+        # stones within distance 2 (king moves) of each cell, y * size + x
+        self.near: list[int] = [0] * (size * size)
+        # empty cells with at least one stone within distance 2
+        self.frontier: set[int] = set()
+        # y * size + x of the stones of each player (index 0 unused)
+        self.stones: list[set[int]] = [set(), set(), set()]
+        # (min x, min y, max x, max y) of all stones, recomputed lazily
+        self._bounds: tuple[int, int, int, int] | None = None
+        self._bounds_stale = False
+        # objects with on_set(x, y, old, new) and reset(), told about every change
+        self.watchers: list = []
 
     def clear(self) -> None:
         self.grid = [[0 for _ in range(self.size)] for _ in range(self.size)]
+        self.history = []
+        self.hash = 0
+        self.near = [0] * (self.size * self.size)
+        self.frontier = set()
+        self.stones = [set(), set(), set()]
+        self._bounds = None
+        self._bounds_stale = False
+        for watcher in self.watchers:
+            watcher.reset()
 
     def is_valid_move(self, x: int, y: int) -> bool:
         return 0 <= x < self.size and 0 <= y < self.size and self.grid[y][x] == 0
@@ -15,9 +42,135 @@ class Board:
             return False
         if not force and not self.is_valid_move(x, y):
             return False
-        self.grid[y][x] = player
+        if self.grid[y][x]:
+            self._forget(x, y)
+        self._set(x, y, player)
+        if player:
+            self.history.append((x, y, player))
         return True
 
+    def remove_stone(self, x: int, y: int) -> None:
+        if self.grid[y][x]:
+            self._forget(x, y)
+        self._set(x, y, 0)
+
+    def _forget(self, x: int, y: int) -> None:
+        for i in range(len(self.history) - 1, -1, -1):
+            if self.history[i][0] == x and self.history[i][1] == y:
+                del self.history[i]
+                return
+
+    def make_move(self, x: int, y: int, player: int) -> None:
+        """Search-side place, no validation, undone with undo_move"""
+        self._set(x, y, player)
+        self.history.append((x, y, player))
+
+    def undo_move(self) -> tuple[int, int, int]:
+        x, y, player = self.history.pop()
+        self._set(x, y, 0)
+        return x, y, player
+
+    def set_position(self, moves: list[tuple[int, int, int]]) -> None:
+        """Bring the board to these moves, keeping what it already has.
+
+        Moves shared with the start of the history stay; the rest of the
+        history is undone and the remaining moves are played, so hashes
+        and watchers are updated per stone instead of rebuilt.
+        """
+        history = self.history
+        limit = min(len(history), len(moves))
+        k = 0
+        while k < limit and history[k] == moves[k]:
+            k += 1
+        if k == 0 and history:
+            # nothing in common: a rebuild is cheaper than undoing it all
+            self.clear()
+        else:
+            for _ in range(len(history) - k):
+                self.undo_move()
+        for x, y, player in moves[k:]:
+            self.place_stone(x, y, player, force=True)
+
+    def copy(self) -> Board:
+        """Same position and history on a new board, without watchers"""
+        board = type(self)(self.size)
+        for x, y, player in self.history:
+            board.make_move(x, y, player)
+        return board
+
+    @property
+    def last_move(self) -> tuple[int, int, int] | None:
+        return self.history[-1] if self.history else None
+
+    def _set(self, x: int, y: int, player: int) -> None:
+        """Single write path for the grid, overridden by other engines"""
+        row = self.grid[y]
+        old = row[x]
+        base = (y * self.size + x) * 2 - 1
+        if old:
+            self.hash ^= self.zobrist[base + old]
+        if player:
+            self.hash ^= self.zobrist[base + player]
+        row[x] = player
+        i = y * self.size + x
+        if old:
+            self.stones[old].discard(i)
+        if player:
+            self.stones[player].add(i)
+        if not old and player:
+            self._update_near(x, y, 1)
+            if not self._bounds_stale:
+                self._grow_bounds(x, y)
+        elif old and not player:
+            self._update_near(x, y, -1)
+            self._bounds_stale = True
+        for watcher in self.watchers:
+            watcher.on_set(x, y, old, player)
+
+    def _update_near(self, x: int, y: int, delta: int) -> None:
+        n = self.size
+        near = self.near
+        frontier = self.frontier
+        grid = self.grid
+        for ny in range(max(0, y - 2), min(n, y + 3)):
+            row = grid[ny]
+            base = ny * n
+            for nx in range(max(0, x - 2), min(n, x + 3)):
+                i = base + nx
+                near[i] += delta
+                if row[nx]:
+                    continue
+                if near[i]:
+                    frontier.add(i)
+                else:
+                    frontier.discard(i)
+        if delta > 0:
+            frontier.discard(y * n + x)
+
+    def _grow_bounds(self, x: int, y: int) -> None:
+        b = self._bounds
+        if b is None:
+            self._bounds = (x, y, x, y)
+        elif not (b[0] <= x <= b[2] and b[1] <= y <= b[3]):
+            self._bounds = (min(b[0], x), min(b[1], y), max(b[2], x), max(b[3], y))
+
+    def bounds(self, margin: int = 0) -> tuple[int, int, int, int] | None:
+        """(x0, y0, x1, y1) inclusive box around every stone, widened by
+        margin and clipped to the board; None on an empty board"""
+        if self._bounds_stale:
+            self._bounds = None
+            self._bounds_stale = False
+            n = self.size
+            for player in (1, 2):
+                for i in self.stones[player]:
+                    self._grow_bounds(i % n, i // n)
+        b = self._bounds
+        if b is None:
+            return None
+        m = self.size - 1
+        return (max(b[0] - margin, 0), max(b[1] - margin, 0),
+                min(b[2] + margin, m), min(b[3] + margin, m))
+
     def count_consecutive(self, x: int, y: int, dx: int, dy: int, player: int) -> int:
         count = 0
         i, j = x + dx, y + dy
@@ -29,30 +182,42 @@ class Board:
 
     def check_win(self, player: int) -> bool:
         n = self.size
-        for y in range(n):
-            for x in range(n):
-                if self.grid[y][x] != player:
-                    continue
-                if x <= n - 5 and all(self.grid[y][x + k] == player for k in range(5)):
-                    return True
-                if y <= n - 5 and all(self.grid[y + k][x] == player for k in range(5)):
-                    return True
-                if (x <= n - 5 and y <= n - 5 and all(self.grid[y + k][x + k] == player for k in range(5))):
-                    return True
-                if (x <= n - 5 and y >= 4 and all(self.grid[y - k][x + k] == player for k in range(5))):
-                    return True
+        grid = self.grid
+        for i in self.stones[player]:
+            x, y = i % n, i // n
+            if x <= n - 5 and all(grid[y][x + k] == player for k in range(1, 5)):
+                return True
+            if y <= n - 5 and all(grid[y + k][x] == player for k in range(1, 5)):
+                return True
+            if (x <= n - 5 and y <= n - 5 and all(grid[y + k][x + k] == player for k in range(1, 5))):
+                return True
+            if (x <= n - 5 and y >= 4 and all(grid[y - k][x + k] == player for k in range(1, 5))):
+                return True
+        return False
+
+    def is_winning_move(self, x: int, y: int, player: int) -> bool:
+        """Five through (x, y) for player, only the four lines through it"""
+        for dx, dy in ((1, 0), (0, 1), (1, 1), (1, -1)):
+            total = 1 + self.count_consecutive(x, y, dx, dy, player) + self.count_consecutive(x, y, -dx, -dy, player)
+            if total >= 5:
+                return True
         return False
 
+    def last_move_wins(self) -> bool:
+        if not self.history:
+            return False
+        x, y, player = self.history[-1]
+        return self.is_winning_move(x, y, player)
+
     def check_win_in_1(self, player: int) -> list[tuple[int, int]]:
+        # a cell completing a five touches one of its stones, so it is on
+        # the frontier; sorted flat indices keep the row-major order
+        n = self.size
         moves = []
-        for y in range(self.size):
-            for x in range(self.size):
-                if not self.is_valid_move(x, y):
-                    continue
-                self.grid[y][x] = player
-                if self.check_win(player):
-                    moves.append((x, y))
-                self.grid[y][x] = 0
+        for i in sorted(self.frontier):
+            x, y = i % n, i // n
+            if self.is_winning_move(x, y, player):
+                moves.append((x, y))
         return moves
 
     def check_lose_in_1(self, player: int) -> list[tuple[int, int]]:
@@ -63,24 +228,23 @@ class Board:
         moves = []
         dirs = [(1, 0), (0, 1), (1, 1), (1, -1)]
         n = self.size
-        for y in range(n):
-            for x in range(n):
-                if not self.is_valid_move(x, y):
-                    continue
-                self.grid[y][x] = player
-                for dx, dy in dirs:
-                    left = self.count_consecutive(x, y, -dx, -dy, player)
-                    right = self.count_consecutive(x, y, dx, dy, player)
-                    total = 1 + left + right
-                    if total >= 3:
-                        lx, ly = x - (left + 1) * dx, y - (left + 1) * dy
-                        rx, ry = x + (right + 1) * dx, y + (right + 1) * dy
-                        open_left = 0 <= lx < n and 0 <= ly < n and self.grid[ly][lx] == 0
-                        open_right = (0 <= rx < n and 0 <= ry < n and self.grid[ry][rx] == 0)
-                        if open_left or open_right:
-                            moves.append((x, y))
-                            break
-                self.grid[y][x] = 0
+        # a run of three through the cell touches one of its stones
+        for i in sorted(self.frontier):
+            x, y = i % n, i // n
+            self.grid[y][x] = player
+            for dx, dy in dirs:
+                left = self.count_consecutive(x, y, -dx, -dy, player)
+                right = self.count_consecutive(x, y, dx, dy, player)
+                total = 1 + left + right
+                if total >= 3:
+                    lx, ly = x - (left + 1) * dx, y - (left + 1) * dy
+                    rx, ry = x + (right + 1) * dx, y + (right + 1) * dy
+                    open_left = 0 <= lx < n and 0 <= ly < n and self.grid[ly][lx] == 0
+                    open_right = (0 <= rx < n and 0 <= ry < n and self.grid[ry][rx] == 0)
+                    if open_left or open_right:
+                        moves.append((x, y))
+                        break
+            self.grid[y][x] = 0
         return moves
 
     def check_lose_in_2(self, player: int) -> list[tuple[int, int]]:
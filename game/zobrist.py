@@ -0,0 +1,27 @@
+from __future__ import annotations
+import random
+
+
+ZOBRIST_SEED = 0x60D0C0
+
+
+_TABLES: dict[int, list[int]] = {}
+
+
+def zobrist_table(size: int) -> list[int]:
+    """64-bit keys, two per cell: index (y * size + x) * 2 + player - 1.
+
+    Seeded so hashes are stable across runs (opening book, caches).
+    """
+    table = _TABLES.get(size)
+    if table is None:
+        rng = random.Random(ZOBRIST_SEED ^ size)
+        table = [rng.getrandbits(64) for _ in range(2 * size * size)]
+        _TABLES[size] = table
+    return table
+
+
+_side = random.Random(ZOBRIST_SEED + 1)
+# extra keys for search state that the stones alone do not encode
+SIDE_KEYS: tuple[int, ...] = tuple(_side.getrandbits(64) for _ in range(4))
+del _side
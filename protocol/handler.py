@@ -1,14 +1,91 @@
+from __future__ import annotations
+import os
+import time
+from typing import TYPE_CHECKING
+
+from ai.book import OpeningBook
 from ai.minimax import MinimaxAI
+from ai.pattern_table import FIELD_MASK, FIVE_SHIFT, FOUR_SHIFT, OPEN_FOUR_SHIFT, OPEN_THREE_SHIFT
 from ai.patterns import PatternDetector
+from ai.threatmap import ThreatMap
+from ai.threatsearch import ThreatSolver
+from ai.timemanager import TimeManager
+from game.bitboard import BitBoard
 from game.board import Board
+from protocol.ponder import Ponderer
+from protocol.trace import Tracer
+
+if TYPE_CHECKING:
+    from ai.parallel import ParallelSearch
+
+
+# iterative deepening stops here even with time to spare
+MAX_SEARCH_DEPTH = 10
+
+# share of the move budget the VCF and VCT solvers may each use
+SOLVER_TIME_SHARE = 0.15
+
+# share of the move budget left to deepen a ponder hit
+PONDER_HIT_TIME_SHARE = 0.5
+
+BOARD_ENGINES: dict[str, type[Board]] = {
+    "grid": Board,
+    "bitboard": BitBoard,
+}
+
+_COORDS: dict[int, dict[str, int]] = {}
+_FIELDS = {"1": 1, "2": 2}
+
+
+def parse_stones(lines: list[str], size: int) -> list[tuple[int, int, int]]:
+    """BOARD lines into (x, y, 1 or 2), skipping malformed or off-board ones"""
+    coords = _COORDS.get(size)
+    if coords is None:
+        coords = _COORDS[size] = {str(i): i for i in range(size)}
+    coord, field = coords.get, _FIELDS.get
+    stones = []
+    for ln in lines:
+        parts = ln.split(",")
+        if len(parts) != 3:
+            continue
+        x, y, v = coord(parts[0].strip()), coord(parts[1].strip()), field(parts[2].strip())
+        if x is not None and y is not None and v is not None:
+            stones.append((x, y, v))
+    return stones
 
 
 class ProtocolHandler:
-    def __init__(self):
+    def __init__(
+        self, board_engine: str | None = None, ponder: bool | None = None,
+        book: OpeningBook | None = None, workers: int | None = None,
+    ):
+        engine = board_engine or os.environ.get("PBRAIN_BOARD", "grid")
+        if engine not in BOARD_ENGINES:
+            raise ValueError(f"unknown board engine: {engine}")
+        self.board_engine = engine
+        self.board_class = BOARD_ENGINES[engine]
         self.should_exit = False
         self.board: Board | None = None
+        self.threats: ThreatMap | None = None
         self.ready = False
         self.info: dict[str, str] = {}
+        self.ai = MinimaxAI(MAX_SEARCH_DEPTH)
+        self.timer = TimeManager(self.info)
+        self.solver = ThreatSolver()
+        if ponder is None:
+            ponder = os.environ.get("PBRAIN_PONDER", "0") == "1"
+        self.ponderer = Ponderer(self.ai) if ponder else None
+        self.ponder_ready = False
+        # a server shares one book between its sessions
+        self.book = book if book is not None else OpeningBook.open_default()
+        # a fixed count is not changed by INFO workers (the server's
+        # worker processes are daemonic and cannot start a pool)
+        self.fixed_workers = workers is not None
+        if workers is None:
+            workers = int(os.environ.get("PBRAIN_WORKERS", "1") or 1)
+        self.workers = max(workers, 1)
+        self.parallel: ParallelSearch | None = None
+        self.tracer = Tracer()
 
     def process(self, line: str) -> str | None:
         parts = line.strip().split()
@@ -16,6 +93,8 @@ class ProtocolHandler:
             return None
 
         cmd = parts[0].upper()
+        if cmd != "INFO":
+            self.stop_pondering()
         if cmd == "START":
             return self.handle_start(parts)
         if cmd == "BEGIN":
@@ -26,8 +105,13 @@ class ProtocolHandler:
             return self.handle_info(parts)
         if cmd == "ABOUT":
             return self.handle_about()
+        if cmd == "TAKEBACK":
+            return self.handle_takeback(parts)
+        if cmd == "RESTART":
+            return self.handle_restart()
         if cmd == "END":
             self.should_exit = True
+            self.close_parallel()
             return None
         return f"UNKNOWN {line}"
 
@@ -37,18 +121,34 @@ class ProtocolHandler:
         size = int(parts[1])
         if not 5 <= size <= 100:
             return "ERROR invalid board size"
-        self.board = Board(size)
+        self.new_board(size)
         self.ready = True
         return "OK"
 
+    def new_board(self, size: int) -> None:
+        """Fresh board and per-game state (threat map, search tables)"""
+        self.board = self.board_class(size)
+        self.threats = ThreatMap(self.board)
+        self.ai.new_game()
+        self.solver.clear()
+
     def handle_begin(self) -> str:
+        self.timer.start()
+        self.tracer.start()
         if not self.board:
             return "ERROR board not initialized"
-        c = self.board.size // 2
-        self.board.place_stone(c, c, 1)
-        return f"{c},{c}"
+        move = self.book_move()
+        if move is None:
+            c = self.board.size // 2
+            move = (c, c)
+            self.tracer.rule = "center"
+        self.board.place_stone(move[0], move[1], 1)
+        self.ponder_ready = True
+        return self.reply(*move)
 
     def handle_turn(self, parts: list[str]) -> str:
+        self.timer.start()
+        self.tracer.start()
         if not self.board:
             return "ERROR board not initialized"
         if len(parts) < 2:
@@ -66,7 +166,7 @@ class ProtocolHandler:
             return "ERROR invalid move"
 
         self.board.place_stone(x, y, 2, force=True)
-        move = self.find_best_strategic_move()
+        move = self.book_move() or self.find_best_strategic_move()
 
         if move is None:
             return "ERROR no valid moves"
@@ -82,116 +182,212 @@ class ProtocolHandler:
                 return "ERROR no valid moves"
 
         self.board.place_stone(mx, my, 1)
-        return f"{mx},{my}"
+        self.ponder_ready = True
+        return self.reply(mx, my)
 
     def handle_board_lines(self, lines: list[str]) -> str:
+        self.timer.start()
+        self.tracer.start()
+        self.stop_pondering()
         if not self.board:
-            self.board = Board(20)
+            self.new_board(20)
             self.ready = True
 
-        self.board.clear()
+        # resumes and takebacks share most moves with the current board
+        self.board.set_position(parse_stones(lines, self.board.size))
 
-        for ln in lines:
-            if not ln:
-                continue
-            try:
-                parts = ln.split(",")
-                if len(parts) != 3:
-                    continue
-                x, y, v = map(int, parts)
-                self.board.place_stone(x, y, v, force=True)
-            except (ValueError, IndexError):
-                continue
-
-        move = self.find_best_strategic_move()
+        move = self.book_move() or self.find_best_strategic_move()
         if move is None:
             c = self.board.size // 2
-            return f"{c},{c}"
+            if not self.board.is_valid_move(c, c):
+                return "ERROR no valid moves"
+            move = (c, c)
+            self.tracer.rule = "center"
 
         mx, my = move
         self.board.place_stone(mx, my, 1)
-        return f"{mx},{my}"
+        self.ponder_ready = True
+        return self.reply(mx, my)
+
+    def handle_takeback(self, parts: list[str]) -> str:
+        if not self.board:
+            return "ERROR no board"
+        try:
+            x, y = map(int, parts[1].split(","))
+        except (IndexError, ValueError):
+            return "ERROR invalid parameters"
+        if not (0 <= x < self.board.size and 0 <= y < self.board.size) or not self.board.grid[y][x]:
+            return "ERROR no stone there"
+        last = self.board.last_move
+        if last is not None and last[:2] == (x, y):
+            self.board.undo_move()
+        else:
+            self.board.remove_stone(x, y)
+        self.ponder_ready = False
+        return "OK"
+
+    def handle_restart(self) -> str:
+        """Same size, empty board; the search tables stay warm"""
+        if not self.board:
+            return "ERROR no board"
+        self.board.clear()
+        self.ponder_ready = False
+        return "OK"
 
     def handle_info(self, parts: list[str]) -> None:
         if len(parts) >= 3:
-            self.info[parts[1].lower()] = " ".join(parts[2:])
+            key = parts[1].lower()
+            self.info[key] = " ".join(parts[2:])
+            if key == "max_memory" and parts[2].isdigit():
+                self.stop_pondering()
+                self.ai.set_memory_limit(int(parts[2]))
+            elif key == "workers" and parts[2].isdigit() and not self.fixed_workers:
+                self.workers = max(int(parts[2]), 1)
+                self.close_parallel()
         return None
 
+    def start_pondering(self) -> None:
+        """Think on the opponent's time, once our move has been sent"""
+        if self.ponderer and self.ponder_ready and self.board:
+            self.ponderer.start(self.board, 1, self.expected_reply())
+        self.ponder_ready = False
+
+    def expected_reply(self) -> tuple[int, int] | None:
+        """Opponent reply from the principal variation of our last search"""
+        searcher = self.parallel if self.workers > 1 and self.parallel is not None else self.ai
+        pv = searcher.pv
+        if len(pv) < 2 or not self.board.history or self.board.history[-1][:2] != pv[0]:
+            return None
+        return pv[1]
+
+    def stop_pondering(self) -> None:
+        if self.ponderer:
+            self.ponderer.stop()
+
+    def searcher(self) -> MinimaxAI | ParallelSearch:
+        """Main search, spread over worker processes when workers > 1"""
+        if self.workers <= 1:
+            return self.ai
+        if self.parallel is None:
+            # multiprocessing is only imported when workers are asked for
+            from ai.parallel import ParallelSearch
+            self.parallel = ParallelSearch(self.workers, MAX_SEARCH_DEPTH, self.board_engine)
+        return self.parallel
+
+    def close_parallel(self) -> None:
+        if self.parallel is not None:
+            self.parallel.close()
+            self.parallel = None
+
     def handle_about(self) -> str:
         return 'name="pbrain-gomoku-ai", version="2.2", author="Raphael Guerin", country="FR"'
 
+    def book_move(self) -> tuple[int, int] | None:
+        if self.book is None or self.board is None:
+            return None
+        move = self.book.lookup(self.board)
+        if move is not None:
+            self.tracer.rule = "book"
+        return move
+
+    def reply(self, x: int, y: int) -> str:
+        """The move, preceded by the statistics lines when tracing"""
+        lines = self.tracer.finish((x, y), len(self.board.history), self.timer.budget())
+        return "\n".join(lines + [f"{x},{y}"])
+
+    def _solver_deadline(self) -> float:
+        return time.perf_counter() + self.timer.budget() * SOLVER_TIME_SHARE
+
     def find_best_strategic_move(self) -> tuple[int, int] | None:
-        """Priority-based strategy (fast)"""
+        """Priority-based strategy read from the threat map (fast)"""
         if not self.board:
             return None
-    
-        detector = PatternDetector(self.board)
-    
-        for y in range(self.board.size):
-            for x in range(self.board.size):
-                if self.board.grid[y][x] == 0:
-                    threats = detector.analyze_move(x, y, 1)
-                    if threats["five"] > 0:
-                        return (x, y)
-    
-        for y in range(self.board.size):
-            for x in range(self.board.size):
-                if self.board.grid[y][x] == 0:
-                    threats = detector.analyze_move(x, y, 2)
-                    if threats["five"] > 0:
-                        return (x, y)
-    
-        for y in range(self.board.size):
-            for x in range(self.board.size):
-                if self.board.grid[y][x] == 0:
-                    threats = detector.analyze_move(x, y, 2)
-                    if threats["open_four"] > 0:
-                        return (x, y)
-    
-        for y in range(self.board.size):
-            for x in range(self.board.size):
-                if self.board.grid[y][x] == 0:
-                    threats = detector.analyze_move(x, y, 2)
-                    if threats["four"] > 0:
-                        return (x, y)
-    
-        for y in range(self.board.size):
-            for x in range(self.board.size):
-                if self.board.grid[y][x] == 0:
-                    threats = detector.analyze_move(x, y, 1)
-                    if threats["four"] > 0:
-                        return (x, y)
-    
-        for y in range(self.board.size):
-            for x in range(self.board.size):
-                if self.board.grid[y][x] == 0:
-                    threats = detector.analyze_move(x, y, 1)
-                    if threats["open_four"] > 0:
-                        return (x, y)
-    
+
+        trace = self.tracer
+        cells = self.threats.cells()
+
+        for x, y, mine, _ in cells:
+            if (mine >> FIVE_SHIFT) & FIELD_MASK:
+                trace.rule = "win"
+                return (x, y)
+
+        for x, y, _, theirs in cells:
+            if (theirs >> FIVE_SHIFT) & FIELD_MASK:
+                trace.rule = "block-five"
+                return (x, y)
+
+        move = self.solver.solve_vcf(self.board, 1, self._solver_deadline(), self.threats)
+        trace.solver_nodes += self.solver.nodes
+        if move is not None:
+            trace.rule = "vcf"
+            return move
+
+        for x, y, _, theirs in cells:
+            if (theirs >> OPEN_FOUR_SHIFT) & FIELD_MASK:
+                trace.rule = "block-open-four"
+                return (x, y)
+
+        for x, y, _, theirs in cells:
+            if (theirs >> FOUR_SHIFT) & FIELD_MASK:
+                trace.rule = "block-four"
+                return (x, y)
+
+        for x, y, mine, _ in cells:
+            if (mine >> FOUR_SHIFT) & FIELD_MASK:
+                trace.rule = "four"
+                return (x, y)
+
+        for x, y, mine, _ in cells:
+            if (mine >> OPEN_FOUR_SHIFT) & FIELD_MASK:
+                trace.rule = "open-four"
+                return (x, y)
+
+        move = self.solver.solve_vct(self.board, 1, self._solver_deadline(), self.threats)
+        trace.solver_nodes += self.solver.nodes
+        if move is not None:
+            trace.rule = "vct"
+            return move
+
         best_score = 0
         best_move = None
-        for y in range(self.board.size):
-            for x in range(self.board.size):
-                if self.board.grid[y][x] == 0:
-                    threats = detector.analyze_move(x, y, 1)
-                    if threats["open_three"] >= 2:
-                        return (x, y)
-                    score = threats["open_three"] * 100 + threats["four"] * 50
-                    if score > best_score:
-                        best_score = score
-                        best_move = (x, y)
-    
+        for x, y, mine, _ in cells:
+            open_three = (mine >> OPEN_THREE_SHIFT) & FIELD_MASK
+            if open_three >= 2:
+                trace.rule = "double-three"
+                return (x, y)
+            score = open_three * 100 + ((mine >> FOUR_SHIFT) & FIELD_MASK) * 50
+            if score > best_score:
+                best_score = score
+                best_move = (x, y)
+
         if best_move and best_score > 0:
+            trace.rule = "three"
             return best_move
-    
-        candidates = detector.find_critical_moves(1)
-        if candidates:
-            return (candidates[0][0], candidates[0][1])
-    
+
+        pondered = self.ponderer.result_for(self.board) if self.ponderer else None
+        searcher = self.searcher()
+        if pondered and pondered[1] >= searcher.max_depth:
+            # the opponent's time already took the search as deep as it goes
+            trace.rule = "ponder"
+            return pondered[0]
+        deadline = self.timer.deadline()
+        if pondered:
+            # the pondered iterations are in the transposition table, only
+            # the deeper ones still cost time
+            deadline = self.timer.started + self.timer.budget() * PONDER_HIT_TIME_SHARE
+        move = searcher.find_best_move(self.board, 1, deadline)
+        trace.searched(searcher)
+        trace.rule = "search"
+        if pondered and pondered[1] > searcher.completed_depth:
+            move = pondered[0]
+            trace.rule = "ponder"
+        if move is not None:
+            return move
+
         for y in range(self.board.size):
             for x in range(self.board.size):
                 if self.board.is_valid_move(x, y):
+                    trace.rule = "first-empty"
                     return (x, y)
-    
-        return None
\ No newline at end of file
+
+        return None
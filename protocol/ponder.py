@@ -0,0 +1,76 @@
+from __future__ import annotations
+import threading
+import time
+
+from ai.minimax import MinimaxAI
+from game.board import Board
+
+
+# time spent guessing the opponent's reply before pondering on it
+PREDICT_TIME = 0.2
+
+
+class Ponderer:
+    """Searches on the opponent's time, on a background thread.
+
+    The opponent's reply is predicted with a short search, then our
+    answer to it is searched without deadline until stop() aborts it.
+    The search shares the AI's transposition table, so even a miss
+    leaves useful entries behind.
+    """
+
+    def __init__(self, ai: MinimaxAI):
+        self.ai = ai
+        self.thread: threading.Thread | None = None
+        self.predicted: tuple[int, int] | None = None
+        self.key: int | None = None
+        self.move: tuple[int, int] | None = None
+        self.depth = 0
+
+    def start(
+        self, board: Board, player: int = 1, expected: tuple[int, int] | None = None
+    ) -> None:
+        """expected is the opponent reply from our principal variation, if
+        known; otherwise it is predicted with a short search"""
+        self.stop()
+        self.predicted = self.key = self.move = None
+        self.depth = 0
+        self.thread = threading.Thread(
+            target=self._run, args=(board.copy(), player, expected), daemon=True
+        )
+        self.thread.start()
+
+    def _run(self, board: Board, player: int, expected: tuple[int, int] | None) -> None:
+        opponent = 3 - player
+        reply = expected
+        if reply is None or not board.is_valid_move(*reply):
+            reply = self.ai.find_best_move(board, opponent, time.perf_counter() + PREDICT_TIME)
+        if reply is None or self.ai.abort:
+            return
+        board.make_move(reply[0], reply[1], opponent)
+        if board.last_move_wins():
+            return
+        self.predicted = reply
+        self.key = board.hash
+        move = self.ai.find_best_move(board, player)
+        self.move = move
+        self.depth = self.ai.completed_depth
+
+    def stop(self) -> None:
+        """Abort the background search and wait for it to unwind"""
+        if self.thread is None:
+            return
+        self.ai.abort = True
+        self.thread.join()
+        self.ai.abort = False
+        self.thread = None
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def result_for(self, board: Board) -> tuple[tuple[int, int], int] | None:
+        """(move, depth) if board is the position we pondered on"""
+        if self.move is None or self.key != board.hash:
+            return None
+        return self.move, self.depth
@@ -0,0 +1,32 @@
+from __future__ import annotations
+import queue
+import threading
+from typing import TextIO
+
+
+class LineReader:
+    """Reads a stream on its own thread so the main thread never blocks in I/O.
+
+    readline() mirrors TextIO.readline: it returns "" once the stream is
+    exhausted.
+    """
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.lines: queue.Queue[str] = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        try:
+            for line in self.stream:
+                self.lines.put(line)
+        finally:
+            self.lines.put("")
+
+    def readline(self) -> str:
+        line = self.lines.get()
+        if not line:
+            # keep answering EOF to later calls
+            self.lines.put("")
+        return line
@@ -0,0 +1,256 @@
+"""Many protocol sessions in one server, over a local TCP or Unix socket.
+
+    python -m protocol.server --tcp 127.0.0.1:7070 --workers 4
+    python -m protocol.server --unix /tmp/pbrain.sock
+
+Every connection is an independent game speaking the usual line
+protocol (BOARD ... DONE included); END closes the session. The asyncio
+front end only routes lines: sessions live in worker processes, each
+hosting the ProtocolHandlers of the sessions assigned to it, so a long
+search only delays the sessions of its own worker while their tables
+stay warm between moves. Pattern tables are built once before the
+workers fork and the opening book is opened once per worker.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import itertools
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing.connection import Connection
+
+from ai.book import OpeningBook
+from protocol.handler import ProtocolHandler
+
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+
+def _worker_main(conn: Connection, inherited: list[Connection]) -> None:
+    """Host sessions: (id, lines, arrival time) in, (id, response,
+    finished) out"""
+    # without the front end's copies of the pipes the worker sees EOF
+    # and exits as soon as the server process goes away
+    for other in inherited:
+        other.close()
+    book = OpeningBook.open_default()
+    sessions: dict[int, ProtocolHandler] = {}
+    while True:
+        try:
+            sid, lines, arrived = conn.recv()
+        except EOFError:
+            break
+        if lines is None:
+            handler = sessions.pop(sid, None)
+            if handler is not None:
+                handler.close_parallel()
+            continue
+        handler = sessions.get(sid)
+        if handler is None:
+            # daemonic processes cannot start the pool of a parallel search
+            handler = sessions[sid] = ProtocolHandler(ponder=False, book=book, workers=1)
+        # the move budget counts from the arrival at the front end, time
+        # queued behind the other sessions of this worker included
+        # (perf_counter is the same monotonic clock in every process)
+        handler.timer.arrived = arrived
+        try:
+            if lines[0].upper() == "BOARD":
+                response = handler.handle_board_lines(lines[1:])
+            else:
+                response = handler.process(lines[0])
+            message = (sid, response, handler.should_exit)
+        except Exception as e:
+            # one broken session must not take the others of this worker down
+            sessions.pop(sid, None)
+            message = (sid, f"ERROR {type(e).__name__}: {e}", True)
+        handler.timer.arrived = None
+        try:
+            conn.send(message)
+        except OSError:
+            # the front end is gone
+            break
+
+
+class WorkerDied(Exception):
+    """The process hosting a session exited"""
+
+
+class Worker:
+    """One worker process and the replies it owes"""
+
+    def __init__(self, context, siblings: list[Worker]):
+        self.conn, child = context.Pipe()
+        inherited = [self.conn] + [w.conn for w in siblings]
+        self.process = context.Process(target=_worker_main, args=(child, inherited), daemon=True)
+        self.process.start()
+        child.close()
+        self.pending: dict[int, asyncio.Future] = {}
+        self.sessions = 0
+        self.alive = True
+
+    def on_readable(self) -> bool:
+        """Resolve the answered futures, False once the process is gone"""
+        try:
+            while self.conn.poll():
+                sid, response, finished = self.conn.recv()
+                future = self.pending.pop(sid, None)
+                if future is not None and not future.done():
+                    future.set_result((response, finished))
+        except (EOFError, OSError):
+            return False
+        return True
+
+    def fail(self) -> None:
+        """Mark dead and fail every reply still owed"""
+        self.alive = False
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(WorkerDied(f"worker {self.process.pid} exited"))
+        self.pending.clear()
+
+    def close(self) -> None:
+        self.conn.close()
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+
+
+class EngineServer:
+    def __init__(self, workers: int = DEFAULT_WORKERS):
+        self.context = multiprocessing.get_context("fork" if hasattr(os, "fork") else "spawn")
+        self.workers: list[Worker] = []
+        for _ in range(max(workers, 1)):
+            self.workers.append(Worker(self.context, self.workers))
+        self.ids = itertools.count(1)
+        self.games = 0
+        self.loop: asyncio.AbstractEventLoop | None = None
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        for worker in self.workers:
+            loop.add_reader(worker.conn.fileno(), self._readable, worker)
+
+    def _readable(self, worker: Worker) -> None:
+        if worker.on_readable():
+            return
+        # a dead pipe stays readable: stop watching it, then replace the worker
+        self.loop.remove_reader(worker.conn.fileno())
+        worker.fail()
+        worker.close()
+        others = [w for w in self.workers if w is not worker]
+        replacement = Worker(self.context, others)
+        self.workers[self.workers.index(worker)] = replacement
+        self.loop.add_reader(replacement.conn.fileno(), self._readable, replacement)
+
+    def close(self) -> None:
+        for worker in self.workers:
+            worker.close()
+
+    async def ask(
+        self, worker: Worker, sid: int, lines: list[str], arrived: float | None = None
+    ) -> tuple[str | None, bool]:
+        if not worker.alive:
+            raise WorkerDied("worker exited")
+        future = asyncio.get_running_loop().create_future()
+        worker.pending[sid] = future
+        try:
+            worker.conn.send((sid, lines, arrived))
+        except (BrokenPipeError, OSError) as e:
+            worker.pending.pop(sid, None)
+            raise WorkerDied(str(e))
+        return await future
+
+    async def session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        sid = next(self.ids)
+        # the least busy worker takes the new game
+        worker = min(self.workers, key=lambda w: w.sessions)
+        worker.sessions += 1
+        self.games += 1
+        board: list[str] | None = None
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                if board is None:
+                    arrived = time.perf_counter()
+                line = raw.decode(errors="replace").strip()
+                if not line:
+                    continue
+                if board is not None:
+                    if line.upper() == "DONE":
+                        lines, board = board, None
+                    else:
+                        board.append(line)
+                        continue
+                elif line.upper() == "BOARD":
+                    board = ["BOARD"]
+                    continue
+                else:
+                    lines = [line]
+                response, finished = await self.ask(worker, sid, lines, arrived)
+                if response is not None:
+                    writer.write(response.encode() + b"\n")
+                    await writer.drain()
+                if finished:
+                    break
+        except WorkerDied:
+            # the session's state went with its worker
+            try:
+                writer.write(b"ERROR engine worker exited\n")
+                await writer.drain()
+            except ConnectionError:
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # the server is stopping: end the session without a traceback
+            pass
+        finally:
+            worker.pending.pop(sid, None)
+            if worker.alive:
+                try:
+                    worker.conn.send((sid, None, None))
+                except (BrokenPipeError, OSError):
+                    pass
+            worker.sessions -= 1
+            writer.close()
+
+
+async def serve(server: EngineServer, tcp: str | None = None, unix: str | None = None) -> None:
+    loop = asyncio.get_running_loop()
+    server.attach(loop)
+    if unix:
+        listener = await asyncio.start_unix_server(server.session, path=unix)
+    else:
+        host, _, port = (tcp or "127.0.0.1:7070").rpartition(":")
+        listener = await asyncio.start_server(server.session, host or "127.0.0.1", int(port))
+    stopped = loop.create_future()
+    loop.add_signal_handler(signal.SIGTERM, stopped.set_result, None)
+    async with listener:
+        await stopped
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument("--tcp", metavar="HOST:PORT", help="listen on TCP (default 127.0.0.1:7070)")
+    where.add_argument("--unix", metavar="PATH", help="listen on a Unix socket")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    server = EngineServer(args.workers)
+    try:
+        asyncio.run(serve(server, args.tcp, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if args.unix and os.path.exists(args.unix):
+            os.unlink(args.unix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+from __future__ import annotations
+import json
+import os
+import time
+
+
+class Tracer:
+    """Per-move statistics, reported as MESSAGE/DEBUG lines and/or JSONL.
+
+    Off unless PBRAIN_STATS=1 (protocol lines) or PBRAIN_TRACE=<path>
+    (one JSON record appended per move). The search keeps its counters
+    either way; the tracer only reads them once per move, so being
+    disabled costs nothing in the search itself.
+    """
+
+    def __init__(self, messages: bool | None = None, path: str | None = None):
+        if messages is None:
+            messages = os.environ.get("PBRAIN_STATS", "0") == "1"
+        self.messages = messages
+        self.path = path if path is not None else os.environ.get("PBRAIN_TRACE") or None
+        self.enabled = self.messages or self.path is not None
+        self.started = 0.0
+        self.rule: str | None = None
+        self.search: dict[str, object] = {}
+        self.solver_nodes = 0
+
+    def start(self) -> None:
+        """Call when a move is requested"""
+        self.started = time.perf_counter()
+        self.rule = None
+        self.search = {}
+        self.solver_nodes = 0
+
+    def searched(self, searcher) -> None:
+        """Read the counters of the search that just ran"""
+        self.search = {
+            "depth": searcher.completed_depth,
+            "nodes": searcher.nodes,
+            "cutoffs": getattr(searcher, "cutoffs", 0),
+            "tt_cutoffs": getattr(searcher, "tt_cutoffs", 0),
+            "researches": getattr(searcher, "researches", 0),
+            "qnodes": getattr(searcher, "qnodes", 0),
+            "score": getattr(searcher, "score", None),
+            "pv": [list(m) for m in getattr(searcher, "pv", ())],
+        }
+
+    def finish(self, move: tuple[int, int], ply: int, budget: float) -> list[str]:
+        """Protocol lines to print before the move, writes the trace record"""
+        if not self.enabled:
+            return []
+        elapsed = time.perf_counter() - self.started
+        record = {
+            "ply": ply,
+            "move": list(move),
+            "rule": self.rule,
+            "time_ms": round(elapsed * 1000, 2),
+            "budget_ms": round(budget * 1000, 2),
+            **self.search,
+            "solver_nodes": self.solver_nodes,
+        }
+        if "nodes" in self.search:
+            record["nps"] = round(self.search["nodes"] / elapsed) if elapsed > 0 else 0
+        if self.path is not None:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        if not self.messages:
+            return []
+        summary = f"MESSAGE {self.rule} {record['time_ms']:.0f}ms"
+        if "nodes" in self.search:
+            summary += f" depth {record['depth']} nodes {record['nodes']} ({record['nps']}/s)"
+        return [summary, "DEBUG " + json.dumps(record)]
@@ -0,0 +1,53 @@
+import io
+import json
+import os
+import sys
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tools")))
+from analyze import read_board, read_positions, run
+
+
+class TestAnalyze(unittest.TestCase):
+    def test_records_in_input_order(self):
+        text = "\n".join([
+            json.dumps({"id": "a", "size": 15, "stones": [[7, 7, 1]]}),
+            "not json",
+            # white to move with four in a row completes the five
+            json.dumps({"id": "b", "player": 2, "stones": [[0, 0, 1], [1, 1, 1], [5, 5, 2], [6, 5, 2],
+                                                           [7, 5, 2], [8, 5, 2], [3, 9, 1]]}),
+        ])
+        out = io.StringIO()
+        self.assertEqual(run(read_positions(io.StringIO(text), "auto"), out, 2, 2, 1000), 3)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([r["id"] for r in records], ["a", 2, "b"])
+        self.assertIn("error", records[1])
+        self.assertIn(records[2]["move"], ([4, 5], [9, 5]))
+        self.assertEqual(records[2]["rule"], "win")
+        self.assertEqual(len(records[0]["move"]), 2)
+
+    def test_illegal_positions_are_errors(self):
+        text = "\n".join(json.dumps(record) for record in [
+            {"id": "off", "size": 15, "stones": [[20, 20, 1]]},
+            {"id": "field", "stones": [[7, 7, 3]]},
+            {"id": "twice", "stones": [[7, 7, 1], [7, 7, 2]]},
+            {"id": "player", "stones": [[7, 7, 1]], "player": 3},
+            {"id": "ok", "stones": [[7, 7, 1]]},
+        ])
+        out = io.StringIO()
+        self.assertEqual(run(read_positions(io.StringIO(text), "jsonl"), out, 1, 1, 200), 5)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([sorted(r) for r in records[:4]], [["error", "id"]] * 4)
+        self.assertIn("move", records[4])
+        blocks = ["START 15", "BOARD", "15,0,1", "DONE", "BOARD", "3,3,1", "3,3,2", "DONE"]
+        self.assertTrue(all("error" in p for p in read_board(blocks)))
+
+    def test_board_blocks(self):
+        lines = ["START 15", "BOARD", "7,7,2", "DONE", "BOARD", "x", "DONE"]
+        positions = list(read_board(lines))
+        self.assertEqual(positions[0], (1, 15, [(7, 7, 2)]))
+        self.assertIn("error", positions[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
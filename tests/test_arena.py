@@ -0,0 +1,22 @@
+import os
+import sys
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tools")))
+from arena import DEFAULT_ENGINE, play_game
+
+
+class TestPlayGame(unittest.TestCase):
+    def test_engine_failing_to_start_loses(self):
+        engines = [
+            ("good", [sys.executable, DEFAULT_ENGINE], {}),
+            ("broken", [os.path.join(os.path.dirname(__file__), "no-such-engine")], {}),
+        ]
+        for black in (0, 1):
+            record = play_game(0, engines, black, [], 15, 1000, 0, 1000)
+            self.assertEqual(record["winner"], "good")
+            self.assertEqual(record["reason"], "broken crash")
+
+
+if __name__ == '__main__':
+    unittest.main()
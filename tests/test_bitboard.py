@@ -0,0 +1,75 @@
+import random
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from game.board import Board
+from game.bitboard import BitBoard
+from protocol.handler import ProtocolHandler
+
+
+def random_pair(size: int, stones: int, seed: int) -> tuple[Board, BitBoard]:
+    rng = random.Random(seed)
+    grid, bits = Board(size), BitBoard(size)
+    cells = [(x, y) for y in range(size) for x in range(size)]
+    rng.shuffle(cells)
+    for i, (x, y) in enumerate(cells[:stones]):
+        player = 1 + i % 2
+        grid.place_stone(x, y, player)
+        bits.place_stone(x, y, player)
+    return grid, bits
+
+
+class TestBitBoard(unittest.TestCase):
+    def test_wins_on_every_edge(self):
+        for size in (5, 20, 100):
+            n = size - 1
+            lines = [
+                [(k, 0) for k in range(5)],
+                [(n, n - k) for k in range(5)],
+                [(k, k) for k in range(5)],
+                [(n - k, k) for k in range(5)],
+            ]
+            for line in lines:
+                board = BitBoard(size)
+                for x, y in line[:4]:
+                    board.place_stone(x, y, 1)
+                self.assertFalse(board.check_win(1))
+                board.place_stone(*line[4], 1)
+                self.assertTrue(board.check_win(1), f"{size} {line}")
+
+    def test_no_wrap_around_rows(self):
+        board = BitBoard(10)
+        for x, y in [(7, 3), (8, 3), (9, 3), (0, 4), (1, 4)]:
+            board.place_stone(x, y, 1)
+        self.assertFalse(board.check_win(1))
+        self.assertEqual(board.count_consecutive(9, 3, 1, 0, 1), 0)
+
+    def test_matches_grid_board(self):
+        for seed in range(30):
+            size = random.Random(seed).choice((5, 9, 15, 20))
+            grid, bits = random_pair(size, size * size // 3, seed)
+            for player in (1, 2):
+                self.assertEqual(grid.check_win(player), bits.check_win(player))
+                self.assertEqual(grid.check_win_in_1(player), bits.check_win_in_1(player))
+                self.assertEqual(grid.check_win_in_2(player), bits.check_win_in_2(player))
+            self.assertEqual(str(grid), str(bits))
+
+    def test_remove_stone(self):
+        board = BitBoard(20)
+        for i in range(5):
+            board.place_stone(i, 0, 2)
+        board.remove_stone(2, 0)
+        self.assertFalse(board.check_win(2))
+        self.assertTrue(board.is_valid_move(2, 0))
+
+    def test_handler_engine_selection(self):
+        handler = ProtocolHandler(board_engine="bitboard")
+        self.assertEqual(handler.process("START 100"), "OK")
+        self.assertIsInstance(handler.board, BitBoard)
+        with self.assertRaises(ValueError):
+            ProtocolHandler(board_engine="nope")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 
+import random
 import unittest
 import sys
 import os
@@ -35,6 +36,100 @@ class TestBoard(unittest.TestCase):
         self.assertTrue(success, "Should be able to remove move without force=True (Bug?)")
         self.assertEqual(self.board.grid[10][10], 0)
 
+    def test_make_undo_restores_position(self):
+        self.board.place_stone(3, 3, 2)
+        self.board.make_move(4, 4, 1)
+        self.board.make_move(5, 5, 2)
+        self.assertEqual(self.board.undo_move(), (5, 5, 2))
+        self.assertEqual(self.board.undo_move(), (4, 4, 1))
+        self.assertEqual(self.board.grid[4][4], 0)
+        self.assertEqual(self.board.last_move, (3, 3, 2))
+
+    def test_last_move_wins(self):
+        for i in range(4):
+            self.board.make_move(10 + i, 10 - i, 2)
+        self.assertFalse(self.board.last_move_wins())
+        self.board.make_move(9, 11, 2)
+        self.assertTrue(self.board.last_move_wins())
+        self.board.undo_move()
+        self.assertFalse(self.board.last_move_wins())
+
+    def test_win_in_1_large_board(self):
+        board = Board(100)
+        for i in range(4):
+            board.place_stone(95 + i, 99, 1)
+        self.assertEqual(board.check_win_in_1(1), [(94, 99), (99, 99)])
+        self.assertEqual(board.check_lose_in_1(2), [(94, 99), (99, 99)])
+
+    def test_frontier_follows_place_and_undo(self):
+        def brute(board):
+            n = board.size
+            return {
+                y * n + x
+                for y in range(n) for x in range(n)
+                if board.grid[y][x] == 0 and any(
+                    board.grid[j][i]
+                    for j in range(max(0, y - 2), min(n, y + 3))
+                    for i in range(max(0, x - 2), min(n, x + 3))
+                )
+            }
+
+        rng = random.Random(7)
+        board = Board(12)
+        self.assertEqual(board.frontier, set())
+        for step in range(80):
+            if board.history and rng.random() < 0.3:
+                board.undo_move()
+            else:
+                x, y = rng.randrange(12), rng.randrange(12)
+                if board.is_valid_move(x, y):
+                    board.make_move(x, y, 1 + step % 2)
+            self.assertEqual(board.frontier, brute(board))
+        board.clear()
+        self.assertEqual(board.frontier, set())
+
+    def test_stones_and_bounds_follow_the_grid(self):
+        rng = random.Random(3)
+        board = Board(30)
+        self.assertIsNone(board.bounds())
+        for step in range(120):
+            if board.history and rng.random() < 0.3:
+                board.undo_move()
+            else:
+                x, y = rng.randrange(5, 25), rng.randrange(8, 20)
+                if board.is_valid_move(x, y):
+                    board.make_move(x, y, 1 + step % 2)
+            for player in (1, 2):
+                cells = {y * 30 + x for y in range(30) for x in range(30) if board.grid[y][x] == player}
+                self.assertEqual(board.stones[player], cells)
+            xs = [x for x, _, _ in board.history]
+            ys = [y for _, y, _ in board.history]
+            expected = (min(xs), min(ys), max(xs), max(ys)) if xs else None
+            self.assertEqual(board.bounds(), expected)
+        board.clear()
+        self.assertEqual(board.stones, [set(), set(), set()])
+        self.assertIsNone(board.bounds())
+
+    def test_bounds_margin_is_clipped(self):
+        board = Board(20)
+        board.place_stone(1, 18, 1)
+        board.place_stone(3, 17, 2)
+        self.assertEqual(board.bounds(2), (0, 15, 5, 19))
+
+    def test_set_position_matches_a_fresh_board(self):
+        game = [(9, 9, 1), (10, 10, 2), (9, 10, 1), (11, 11, 2), (9, 11, 1), (8, 8, 2)]
+        cases = [game[:4], game, game[:3] + [(12, 12, 2)], [(0, 0, 2)], []]
+        board = Board(20)
+        for moves in cases:
+            board.set_position(moves)
+            fresh = Board(20)
+            for x, y, p in moves:
+                fresh.make_move(x, y, p)
+            self.assertEqual(board.history, moves)
+            self.assertEqual(board.grid, fresh.grid)
+            self.assertEqual(board.hash, fresh.hash)
+            self.assertEqual(board.frontier, fresh.frontier)
+
     def test_occupied_cells_missing(self):
         self.assertFalse(hasattr(self.board, 'occupied_cells'), "Board should NOT have occupied_cells (as requested)")
 
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from game.board import Board
+from ai.book import OpeningBook, build_book, canonical, inverse, transform
+from protocol.handler import ProtocolHandler
+
+
+class TestOpeningBook(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "test.book")
+        build_book(self.path, 15, [
+            ([], (7, 7)),
+            ([(7, 7, 2)], (8, 6)),
+            ([(7, 7, 2)], (8, 6)),
+            ([(7, 7, 2)], (6, 6)),
+            ([(7, 7, 1), (8, 6, 2)], (9, 7)),
+        ])
+        self.book = OpeningBook(self.path)
+
+    def tearDown(self):
+        self.book.close()
+        self.dir.cleanup()
+
+    def test_symmetries_round_trip(self):
+        for sym in range(8):
+            self.assertEqual(inverse(*transform(3, 11, sym, 15), sym, 15), (3, 11))
+        stones = [(2, 3, 1), (4, 9, 2)]
+        keys = {canonical([(*transform(x, y, sym, 15), p) for x, y, p in stones], 15)[0]
+                for sym in range(8)}
+        self.assertEqual(len(keys), 1)
+
+    def test_lookup_under_symmetry(self):
+        self.assertEqual(self.book.count, 3)
+        board = Board(15)
+        self.assertEqual(self.book.lookup(board), (7, 7))
+        board.place_stone(7, 7, 2)
+        self.assertIn(self.book.lookup(board), {(8, 6), (6, 6), (6, 8), (8, 8)})
+        board = Board(15)
+        board.place_stone(7, 7, 1)
+        board.place_stone(6, 8, 2)
+        reply = self.book.lookup(board)
+        self.assertEqual(abs(reply[0] - 7) + abs(reply[1] - 7), 2)
+        board.place_stone(0, 0, 1)
+        self.assertIsNone(self.book.lookup(board))
+        self.assertIsNone(self.book.lookup(Board(20)))
+
+    def test_rejects_other_files(self):
+        bad = os.path.join(self.dir.name, "bad.book")
+        with open(bad, "wb") as f:
+            f.write(b"not a book at all")
+        with self.assertRaises(ValueError):
+            OpeningBook(bad)
+        self.assertIsNone(OpeningBook.open_default(bad))
+        self.assertIsNone(OpeningBook.open_default(os.path.join(self.dir.name, "missing")))
+
+    def test_handler_consults_book(self):
+        handler = ProtocolHandler()
+        handler.book = self.book
+        handler.process("START 15")
+        self.assertEqual(handler.process("TURN 7,7"), "8,6")
+
+
+if __name__ == '__main__':
+    unittest.main()
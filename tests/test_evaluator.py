@@ -0,0 +1,57 @@
+import random
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from game.board import Board
+from game.bitboard import BitBoard
+from ai.evaluator import IncrementalEvaluator
+from ai.minimax import MinimaxAI
+
+
+class TestIncrementalEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.ai = MinimaxAI()
+
+    def assert_matches(self, board):
+        for player in (1, 2):
+            self.assertEqual(self.ai.evaluate(board, player), self.ai.evaluate_full(board, player))
+
+    def test_matches_full_evaluation_on_random_games(self):
+        for seed in range(20):
+            rng = random.Random(seed)
+            size = rng.choice((7, 15, 20))
+            board = (Board if seed % 2 else BitBoard)(size)
+            self.assert_matches(board)
+            cells = [(x, y) for y in range(size) for x in range(size)]
+            rng.shuffle(cells)
+            for i, (x, y) in enumerate(cells[: size * size // 2]):
+                board.make_move(x, y, 1 + i % 2)
+                if i % 7 == 0:
+                    self.assert_matches(board)
+                    board.undo_move()
+                    board.make_move(x, y, 1 + i % 2)
+            self.assert_matches(board)
+            while board.history:
+                board.undo_move()
+            self.assertEqual(self.ai.evaluate(board, 1), 0)
+
+    def test_long_runs_and_overwrites(self):
+        board = Board(20)
+        for x in range(7):
+            board.place_stone(x, 4, 1)
+        self.assert_matches(board)
+        board.place_stone(3, 4, 2, force=True)
+        self.assert_matches(board)
+        board.clear()
+        self.assertEqual(self.ai.evaluate(board, 1), 0)
+
+    def test_attach_reuses_watcher(self):
+        board = Board(20)
+        first = IncrementalEvaluator.attach(board)
+        self.assertIs(IncrementalEvaluator.attach(board), first)
+        self.assertEqual(len(board.watchers), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
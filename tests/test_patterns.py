@@ -1,10 +1,67 @@
-
-import unittest
-import sys
 import os
+import random
+import sys
+import tempfile
+import unittest
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from game.board import Board
+from ai import table_cache
+from ai.minimax import MinimaxAI
+from ai.pattern_table import SCORE_TABLE, THREAT_TABLE
 from ai.patterns import PatternDetector
+from ai.threatmap import ThreatMap
+
+
+def reference_analyze(board, x, y, player):
+    """Cell-by-cell scan the lookup tables replaced"""
+    threats = {"five": 0, "open_four": 0, "four": 0, "open_three": 0, "two": 0}
+    n = board.size
+    board.grid[y][x] = player
+    for dx, dy in [(1, 0), (0, 1), (1, 1), (1, -1)]:
+        counts, opens = [0, 0], [False, False]
+        for side, d in enumerate((-1, 1)):
+            i = 1
+            while True:
+                nx, ny = x + d * i * dx, y + d * i * dy
+                if not (0 <= nx < n and 0 <= ny < n):
+                    break
+                if board.grid[ny][nx] == player:
+                    counts[side] += 1
+                    i += 1
+                else:
+                    opens[side] = board.grid[ny][nx] == 0
+                    break
+        count = 1 + counts[0] + counts[1]
+        if count >= 5:
+            threats["five"] += 1
+        elif count == 4 and (opens[0] or opens[1]):
+            threats["open_four" if opens[0] and opens[1] else "four"] += 1
+        elif count == 3 and opens[0] and opens[1]:
+            threats["open_three"] += 1
+        elif count == 2 and (opens[0] or opens[1]):
+            threats["two"] += 1
+        if count < 5:
+            for start in range(-4, 1):
+                stones, has_gap, blocked = 0, False, 0
+                for i in range(5):
+                    nx, ny = x + (start + i) * dx, y + (start + i) * dy
+                    if not (0 <= nx < n and 0 <= ny < n):
+                        blocked += 1
+                        continue
+                    cell = board.grid[ny][nx]
+                    if cell == player:
+                        stones += 1
+                    elif cell == 0:
+                        if has_gap:
+                            break
+                        has_gap = True
+                    else:
+                        blocked += 1
+                if stones in (3, 4) and has_gap and blocked == 0:
+                    threats["four" if stones == 4 else "open_three"] += 1
+                    break
+    board.grid[y][x] = 0
+    return threats
 
 class TestPatternDetector(unittest.TestCase):
     def setUp(self):
@@ -62,5 +119,142 @@ class TestPatternDetector(unittest.TestCase):
         self.assertEqual(threats['four'], 1, "Should detect exactly one Four")
         self.assertEqual(threats['open_three'], 0, "Should NOT detect Open Three (double count bug)")
 
+class TestPatternTables(unittest.TestCase):
+    def test_tables_match_reference_scan(self):
+        for seed in range(15):
+            rng = random.Random(seed)
+            size = rng.choice((6, 12, 20))
+            board = Board(size)
+            for _ in range(rng.randint(size, size * size // 2)):
+                board.place_stone(rng.randrange(size), rng.randrange(size), rng.choice((1, 2)))
+            detector = PatternDetector(board)
+            weights = {"five": 100000, "open_four": 10000, "four": 1000, "open_three": 500, "two": 10}
+            for y in range(size):
+                for x in range(size):
+                    if board.grid[y][x]:
+                        continue
+                    for player in (1, 2):
+                        expected = reference_analyze(board, x, y, player)
+                        self.assertEqual(detector.analyze_move(x, y, player), expected)
+                        score = sum(expected[k] * w for k, w in weights.items())
+                        self.assertEqual(detector._quick_score(x, y, player), score)
+
+    def test_critical_moves_match_a_full_sort(self):
+        for seed, size in enumerate((9, 20, 100)):
+            rng = random.Random(seed)
+            board = Board(size)
+            for _ in range(40):
+                board.place_stone(rng.randrange(size), rng.randrange(size), rng.choice((1, 2)))
+            detector = PatternDetector(board)
+            for player in (1, 2):
+                expected = []
+                for i in sorted(board.frontier):
+                    x, y = i % size, i // size
+                    score = detector._quick_score(x, y, player) * 2 + detector._quick_score(x, y, 3 - player)
+                    if score > 0:
+                        expected.append((x, y, score))
+                expected.sort(key=lambda m: m[2], reverse=True)
+                self.assertEqual(detector.find_critical_moves(player), expected[:15])
+
+    def test_analyze_move_leaves_board_untouched(self):
+        board = Board(20)
+        board.place_stone(10, 10, 1)
+        before = board.hash
+        PatternDetector(board).analyze_move(11, 10, 2)
+        self.assertEqual(board.hash, before)
+        self.assertEqual(board.grid[10][11], 0)
+
+
+class TestThreatMap(unittest.TestCase):
+    def assert_matches(self, board, threat_map):
+        detector = PatternDetector(board)
+        expected = []
+        for y in range(board.size):
+            for x in range(board.size):
+                if board.grid[y][x] == 0:
+                    p1, p2 = detector.analyze_packed(x, y, 1), detector.analyze_packed(x, y, 2)
+                    if p1 or p2:
+                        expected.append((x, y, p1, p2))
+        self.assertEqual(threat_map.cells(), expected)
+
+    def test_updates_follow_moves(self):
+        rng = random.Random(3)
+        board = Board(15)
+        threat_map = ThreatMap(board)
+        self.assert_matches(board, threat_map)
+        for step in range(60):
+            if board.history and rng.random() < 0.25:
+                board.undo_move()
+            else:
+                x, y = rng.randrange(15), rng.randrange(15)
+                if board.is_valid_move(x, y):
+                    board.make_move(x, y, 1 + step % 2)
+            if step % 5 == 0:
+                self.assert_matches(board, threat_map)
+        board.clear()
+        board.place_stone(0, 0, 1)
+        self.assert_matches(board, threat_map)
+
+    def test_search_leaves_only_the_played_stones(self):
+        board = Board(20)
+        for x, y, p in [(9, 9, 1), (10, 10, 2), (9, 10, 1), (11, 11, 2)]:
+            board.place_stone(x, y, p)
+        threat_map = ThreatMap(board)
+        threat_map.cells()
+        board.make_move(8, 8, 1)
+        MinimaxAI(depth=3).find_best_move(board, 2)
+        board.make_move(12, 12, 2)
+        self.assertEqual(threat_map.changed, {8 * 20 + 8: 0, 12 * 20 + 12: 0})
+        lines = set()
+        for x, y in [(8, 8), (12, 12)]:
+            for dx, dy in [(1, 0), (0, 1), (1, 1), (1, -1)]:
+                for k in range(-4, 5):
+                    if 0 <= x + k * dx < 20 and 0 <= y + k * dy < 20:
+                        lines.add((y + k * dy) * 20 + x + k * dx)
+        self.assertEqual(threat_map._affected(), lines)
+        self.assert_matches(board, threat_map)
+
+
+class TestTableCache(unittest.TestCase):
+    def test_rebuilt_when_missing_stale_or_damaged(self):
+        built = []
+
+        def build():
+            built.append(1)
+            return [1, -2, 3], [40, 50, 60]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "tables.py")
+            path = os.path.join(tmp, "tables.cache")
+            with open(source, "w") as f:
+                f.write("# v1\n")
+            load = lambda: table_cache.cached_tables(source, build, 2, 3, path)
+            self.assertEqual(list(load()), [[1, -2, 3], [40, 50, 60]])
+            self.assertEqual(list(load()), [[1, -2, 3], [40, 50, 60]])
+            self.assertEqual(len(built), 1)
+            # the generator changed
+            with open(source, "w") as f:
+                f.write("# v2\n")
+            load()
+            self.assertEqual(len(built), 2)
+            # a flipped byte fails the checksum
+            with open(path, "r+b") as f:
+                f.seek(-1, os.SEEK_END)
+                byte = f.read(1)
+                f.seek(-1, os.SEEK_END)
+                f.write(bytes([byte[0] ^ 1]))
+            self.assertEqual(list(load()), [[1, -2, 3], [40, 50, 60]])
+            self.assertEqual(len(built), 3)
+            load()
+            self.assertEqual(len(built), 3)
+
+    def test_loaded_tables_match_a_fresh_build(self):
+        from ai.pattern_table import build_tables
+        threats, scores = build_tables()
+        self.assertEqual(THREAT_TABLE, threats)
+        self.assertEqual(SCORE_TABLE, scores)
+        self.assertIsInstance(THREAT_TABLE, list)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,441 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from game.board import Board
+from game.bitboard import BitBoard
+from ai.minimax import QUIESCENCE_NODES, WIN_SCORE, MinimaxAI
+from ai.parallel import ParallelSearch, _search_moves, deserialize, serialize
+from ai.timemanager import MIN_BUDGET, TimeManager
+from ai.transposition import EXACT, LOWER, TranspositionTable
+from protocol.handler import ProtocolHandler
+from protocol.trace import Tracer
+
+
+class TestZobrist(unittest.TestCase):
+    def test_hash_is_order_independent(self):
+        a, b = Board(15), BitBoard(15)
+        for x, y, p in [(3, 3, 1), (4, 4, 2), (5, 3, 1)]:
+            a.place_stone(x, y, p)
+        for x, y, p in [(5, 3, 1), (3, 3, 1), (4, 4, 2)]:
+            b.make_move(x, y, p)
+        self.assertEqual(a.hash, b.hash)
+        self.assertNotEqual(a.hash, 0)
+
+    def test_undo_restores_hash(self):
+        board = Board(20)
+        board.place_stone(10, 10, 1)
+        before = board.hash
+        board.make_move(11, 11, 2)
+        board.undo_move()
+        self.assertEqual(board.hash, before)
+        board.remove_stone(10, 10)
+        self.assertEqual(board.hash, 0)
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_store_and_probe(self):
+        tt = TranspositionTable(16)
+        tt.store(12345, 3, EXACT, 42, (1, 2))
+        self.assertEqual(tt.probe(12345), (12345, 3, EXACT, 42, (1, 2)))
+        self.assertIsNone(tt.probe(54321))
+
+    def test_depth_preferred_slot_survives(self):
+        tt = TranspositionTable(2)
+        tt.store(1, 6, EXACT, 10, (0, 0))
+        tt.store(3, 2, LOWER, 5, (1, 1))
+        tt.store(5, 1, LOWER, 7, (2, 2))
+        self.assertEqual(tt.probe(1)[1], 6)
+        self.assertIsNone(tt.probe(3))
+        self.assertEqual(tt.probe(5)[3], 7)
+        tt.new_search()
+        tt.store(7, 1, EXACT, 0, None)
+        self.assertEqual(tt.probe(7)[1], 1)
+        self.assertIsNone(tt.probe(5))
+
+    def test_capacity_from_max_memory(self):
+        self.assertEqual(TranspositionTable.from_memory(0).capacity, 1 << 16)
+        small = TranspositionTable.from_memory(1_000_000).capacity
+        self.assertLess(small, TranspositionTable.from_memory(70_000_000).capacity)
+
+    def test_table_persists_between_turns(self):
+        handler = ProtocolHandler()
+        handler.process("START 20")
+        handler.process("INFO max_memory 10000000")
+        self.assertEqual(handler.ai.tt.capacity, TranspositionTable.capacity_for(10_000_000))
+        handler.process("BEGIN")
+        handler.process("TURN 11,11")
+        filled = len(handler.ai.tt)
+        self.assertGreater(filled, 0)
+        handler.process("TURN 8,8")
+        self.assertGreaterEqual(len(handler.ai.tt), filled)
+
+    def test_search_result_unchanged_by_warm_table(self):
+        board = Board(20)
+        for x, y, p in [(9, 9, 1), (10, 10, 2), (9, 10, 1), (11, 11, 2)]:
+            board.place_stone(x, y, p)
+        cold = MinimaxAI().minimax(board, 2, -float("inf"), float("inf"), True, 1)
+        ai = MinimaxAI()
+        ai.find_best_move(board, 1)
+        warm = ai.minimax(board, 2, -float("inf"), float("inf"), True, 1)
+        self.assertEqual(cold, warm)
+
+
+class TestMoveOrdering(unittest.TestCase):
+    def setUp(self):
+        self.board = Board(20)
+        for x, y, p in [(9, 9, 1), (10, 10, 2), (9, 10, 1), (11, 11, 2), (12, 9, 2)]:
+            self.board.place_stone(x, y, p)
+
+    def test_tt_move_before_generation(self):
+        ai = MinimaxAI()
+        moves = ai.ordered_moves(self.board, 1, 5, (0, 0))
+        self.assertEqual(next(moves), (0, 0))
+        self.assertIsNone(ai._detector)
+        rest = list(moves)
+        self.assertNotIn((0, 0), rest)
+        self.assertEqual(len(rest), 10)
+
+    def test_forced_moves_only(self):
+        board = Board(20)
+        for x in range(4):
+            board.place_stone(5 + x, 5, 2)
+        board.place_stone(4, 5, 1)
+        board.place_stone(10, 10, 1)
+        ai = MinimaxAI()
+        self.assertEqual(list(ai.ordered_moves(board, 1, 6, None)), [(9, 5)])
+        for x in range(4):
+            board.place_stone(5 + x, 15, 1)
+        # our own five beats blocking theirs
+        self.assertIn(list(ai.ordered_moves(board, 1, 6, None)), [[(4, 15)], [(9, 15)]])
+
+    def test_killers_before_generation_below_the_root(self):
+        board = Board(20)
+        for x, y, p in [(9, 9, 1), (10, 10, 2), (9, 10, 1), (11, 11, 2)]:
+            board.make_move(x, y, p)
+        ai = MinimaxAI()
+        ai.killers[4] = [(0, 0), (9, 9)]
+        # at the root a five need not be on the last moves' lines
+        ai.root_ply = 4
+        self.assertNotEqual(next(ai.ordered_moves(board, 1, 4, None)), (0, 0))
+        ai.root_ply = 2
+        scans = []
+        scan = ai.critical_moves
+        ai.critical_moves = lambda b, side: scans.append(side) or scan(b, side)
+        moves = ai.ordered_moves(board, 1, 4, (5, 5))
+        self.assertEqual([next(moves), next(moves)], [(5, 5), (0, 0)])
+        self.assertEqual(scans, [])
+        rest = list(moves)
+        self.assertNotIn((0, 0), rest)
+        self.assertNotIn((5, 5), rest)
+        # a four on the last move's lines must be answered first
+        for x, y, p in [(12, 12, 2), (1, 1, 1), (13, 13, 2)]:
+            board.make_move(x, y, p)
+        ai.killers[7] = [(0, 0)]
+        self.assertEqual(list(ai.ordered_moves(board, 1, 7, None)), [(14, 14)])
+
+    def test_killers_and_history_persist(self):
+        ai = MinimaxAI(depth=3)
+        ai.find_best_move(self.board, 1)
+        self.assertGreater(ai.cutoffs, 0)
+        self.assertTrue(ai.killers)
+        learned = sum(ai.history[1]) + sum(ai.history[2])
+        self.assertGreater(learned, 0)
+        ai.find_best_move(self.board, 1)
+        self.assertTrue(ai.killers)
+        ai.new_game()
+        self.assertFalse(ai.killers)
+
+
+class TestPrincipalVariation(unittest.TestCase):
+    def test_pv_is_a_legal_line_from_the_best_move(self):
+        board = Board(20)
+        for x, y, p in [(9, 9, 1), (10, 10, 2), (9, 10, 1), (11, 11, 2), (12, 9, 2)]:
+            board.place_stone(x, y, p)
+        ai = MinimaxAI(depth=4)
+        move = ai.find_best_move(board, 1)
+        self.assertEqual(ai.pv[0], move)
+        self.assertLessEqual(len(ai.pv), ai.completed_depth)
+        self.assertGreater(len(ai.pv), 1)
+        self.assertEqual(len(set(ai.pv)), len(ai.pv))
+        for x, y in ai.pv:
+            self.assertTrue(board.is_valid_move(x, y))
+        self.assertEqual(len(board.history), 5)
+
+    def test_aspiration_matches_full_window(self):
+        board = Board(20)
+        for x, y, p in [(9, 9, 1), (10, 10, 2), (9, 10, 1), (11, 11, 2)]:
+            board.place_stone(x, y, p)
+        ai = MinimaxAI(depth=3)
+        ai.find_best_move(board, 1)
+        full = MinimaxAI().minimax(board, 3, -float("inf"), float("inf"), True, 1)
+        self.assertEqual(ai.score, full[0])
+
+    def test_winning_line(self):
+        board = Board(20)
+        for x in range(4):
+            board.place_stone(5 + x, 5, 1)
+        board.place_stone(4, 5, 2)
+        board.place_stone(10, 10, 2)
+        ai = MinimaxAI(depth=3)
+        self.assertEqual(ai.find_best_move(board, 1), (9, 5))
+        self.assertEqual(ai.pv, [(9, 5)])
+
+
+class TestQuiescence(unittest.TestCase):
+    def test_five_for_side_to_move(self):
+        board = Board(20)
+        for x, y, p in [(5, 5, 1), (0, 0, 2), (6, 5, 1), (0, 2, 2), (7, 5, 1), (0, 4, 2),
+                        (8, 5, 1), (15, 15, 2)]:
+            board.make_move(x, y, p)
+        ai = MinimaxAI()
+        ai._qs_left = QUIESCENCE_NODES
+        self.assertEqual(ai.quiescence(board, -float("inf"), float("inf"), True, 1, 4), WIN_SCORE)
+        self.assertEqual(len(board.history), 8)
+
+    def test_four_must_be_blocked(self):
+        board = Board(20)
+        for x, y, p in [(10, 10, 1), (5, 5, 2), (10, 12, 1), (6, 5, 2), (12, 12, 1), (7, 5, 2),
+                        (4, 5, 1), (8, 5, 2)]:
+            board.make_move(x, y, p)
+        ai = MinimaxAI()
+        ai._qs_left = QUIESCENCE_NODES
+        score = ai.quiescence(board, -float("inf"), float("inf"), True, 1, 4)
+        self.assertGreater(score, -WIN_SCORE)
+        # no standing pat: the block at (9, 5) was searched
+        self.assertGreater(ai.qnodes, 1)
+        self.assertEqual(len(board.history), 8)
+
+    def test_double_four_is_lost(self):
+        board = Board(20)
+        for x, y, p in [(15, 15, 1), (5, 5, 2), (15, 17, 1), (6, 5, 2), (17, 15, 1), (7, 5, 2),
+                        (17, 17, 1), (8, 6, 2), (0, 19, 1), (8, 7, 2), (19, 0, 1), (8, 8, 2),
+                        (2, 19, 1), (8, 5, 2)]:
+            board.make_move(x, y, p)
+        ai = MinimaxAI()
+        ai._qs_left = QUIESCENCE_NODES
+        self.assertEqual(ai.quiescence(board, -float("inf"), float("inf"), True, 1, 4), -WIN_SCORE)
+
+    def test_budget_limits_nodes(self):
+        # a crowded centre where chains of fours go on well past the budget
+        rng = random.Random(91)
+        board = Board(15)
+        while len(board.history) < 30:
+            x, y = rng.randrange(4, 11), rng.randrange(4, 11)
+            if board.is_valid_move(x, y):
+                board.make_move(x, y, 1 + len(board.history) % 2)
+        unbounded, leaf = MinimaxAI(), MinimaxAI()
+        unbounded._qs_left = 10 ** 6
+        leaf._qs_left = QUIESCENCE_NODES
+        for ai in (unbounded, leaf):
+            ai.quiescence(board, -float("inf"), float("inf"), True, 1, 40)
+            self.assertEqual(len(board.history), 30)
+        self.assertGreater(unbounded.qnodes, QUIESCENCE_NODES)
+        self.assertLessEqual(leaf.qnodes, QUIESCENCE_NODES)
+
+
+class TestTimeControl(unittest.TestCase):
+    def test_budget_from_info(self):
+        info = {}
+        timer = TimeManager(info)
+        self.assertEqual(timer.budget(), 1.0)
+        info["timeout_turn"] = "5000"
+        self.assertAlmostEqual(timer.budget(), 3.9)
+        info["timeout_match"] = "180000"
+        info["time_left"] = "10000"
+        self.assertAlmostEqual(timer.budget(), 0.3)
+        info["time_left"] = "100"
+        self.assertEqual(timer.budget(), MIN_BUDGET)
+        info["timeout_turn"] = "0"
+        self.assertEqual(timer.budget(), MIN_BUDGET)
+
+    def test_budget_counts_from_arrival(self):
+        timer = TimeManager({"timeout_turn": "1000"})
+        timer.arrived = time.perf_counter() - 0.5
+        timer.start()
+        self.assertLess(timer.remaining(), 0.25)
+
+    def test_deadline_is_respected(self):
+        board = Board(20)
+        for x, y, p in [(9, 9, 1), (10, 10, 2), (9, 10, 1), (11, 11, 2), (12, 9, 2)]:
+            board.place_stone(x, y, p)
+        snapshot = [row[:] for row in board.grid]
+        ai = MinimaxAI(depth=20)
+        start = time.perf_counter()
+        move = ai.find_best_move(board, 1, start + 0.3)
+        self.assertLess(time.perf_counter() - start, 0.6)
+        self.assertIsNotNone(move)
+        self.assertGreaterEqual(ai.completed_depth, 1)
+        self.assertEqual(board.grid, snapshot)
+        self.assertEqual(len(board.history), 5)
+
+
+class TestPondering(unittest.TestCase):
+    def test_ponder_hit_and_miss(self):
+        handler = ProtocolHandler(ponder=True)
+        handler.process("START 20")
+        handler.process("INFO timeout_turn 600")
+        handler.process("BEGIN")
+        handler.start_pondering()
+        time.sleep(0.4)
+        handler.process("INFO time_left 100000")
+        self.assertTrue(handler.ponderer.running)
+        handler.stop_pondering()
+        predicted = handler.ponderer.predicted
+        self.assertIsNotNone(predicted)
+        board = handler.board.copy()
+        board.place_stone(predicted[0], predicted[1], 2)
+        self.assertIsNotNone(handler.ponderer.result_for(board))
+
+        handler.start_pondering()
+        handler.ponder_ready = True
+        handler.start_pondering()
+        reply = handler.process("TURN 0,0")
+        self.assertFalse(handler.ponderer.running)
+        x, y = map(int, reply.split(","))
+        self.assertEqual(handler.board.grid[y][x], 1)
+        self.assertEqual(len(handler.board.history), 3)
+
+    def test_full_depth_ponder_hit_answers_at_once(self):
+        handler = ProtocolHandler(ponder=True)
+        handler.process("START 20")
+        handler.process("INFO timeout_turn 5000")
+        handler.process("BEGIN")
+        board = handler.board.copy()
+        board.place_stone(10, 9, 2)
+        ponderer = handler.ponderer
+        ponderer.key, ponderer.move, ponderer.depth = board.hash, (0, 19), handler.ai.max_depth
+        start = time.perf_counter()
+        self.assertEqual(handler.process("TURN 10,9"), "0,19")
+        self.assertLess(time.perf_counter() - start, 1)
+
+
+class TestParallelSearch(unittest.TestCase):
+    def test_serialize_round_trip(self):
+        board = BitBoard(100)
+        for x, y, p in [(99, 99, 1), (0, 0, 2), (50, 42, 1)]:
+            board.place_stone(x, y, p)
+        copy = deserialize(serialize(board), "bitboard")
+        self.assertEqual(copy.history, board.history)
+        self.assertEqual(copy.hash, board.hash)
+
+    def test_matches_serial_score(self):
+        board = Board(20)
+        for x, y, p in [(9, 9, 1), (10, 10, 2), (9, 10, 1), (11, 11, 2), (12, 9, 2)]:
+            board.place_stone(x, y, p)
+        serial = MinimaxAI().minimax(board, 3, -float("inf"), float("inf"), True, 1)
+        search = ParallelSearch(2, depth=3)
+        try:
+            score, move = search.search_depth(board, 1, 3)
+            self.assertEqual(score, serial[0])
+            move = search.find_best_move(board, 1, time.perf_counter() + 5)
+            self.assertIsNotNone(move)
+            self.assertGreater(search.nodes, 0)
+            self.assertEqual(search.pv[0], move)
+            self.assertIsNotNone(search.score)
+        finally:
+            search.close()
+
+    def test_stop_ends_running_tasks(self):
+        board = Board(20)
+        for x, y, p in [(9, 9, 1), (10, 10, 2), (9, 10, 1), (11, 11, 2), (12, 9, 2)]:
+            board.place_stone(x, y, p)
+        search = ParallelSearch(1)
+        try:
+            # no deadline: only the stop flag can end it
+            task = search.pool.submit(_search_moves, serialize(board), "grid", 1, [(8, 8), (13, 8)], 12, None)
+            time.sleep(0.3)
+            search.stop.value = 1
+            self.assertIsNone(task.result(timeout=5))
+            self.assertIsNone(search.search_depth(board, 1, 8, time.perf_counter() + 0.05))
+            # the timed-out round did not leave work queued in the pool
+            start = time.perf_counter()
+            self.assertIsNotNone(search.search_depth(board, 1, 1, time.perf_counter() + 5))
+            self.assertLess(time.perf_counter() - start, 1)
+        finally:
+            search.close()
+
+
+class TestBoardCommands(unittest.TestCase):
+    def test_board_keeps_shared_moves(self):
+        handler = ProtocolHandler(ponder=False)
+        handler.process("START 20")
+        handler.process("INFO timeout_turn 300")
+        handler.handle_board_lines(["9,9,1", "10,10,2"])
+        threats = handler.threats
+        board = handler.board
+        reply = handler.handle_board_lines(["9,9,1", "10,10,2", "bad", "30,1,1", "9,10,3", "11,11,1"])
+        self.assertIs(handler.board, board)
+        self.assertIs(handler.threats, threats)
+        self.assertEqual(board.history[:3], [(9, 9, 1), (10, 10, 2), (11, 11, 1)])
+        x, y = map(int, reply.split(","))
+        self.assertEqual(board.history[3], (x, y, 1))
+
+    def test_centre_fallback_is_played_and_traced(self):
+        handler = ProtocolHandler(ponder=False)
+        handler.process("START 20")
+        handler.book_move = handler.find_best_strategic_move = lambda: None
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.jsonl")
+            handler.tracer = Tracer(messages=False, path=path)
+            self.assertEqual(handler.handle_board_lines(["0,0,2"]), "10,10")
+            with open(path) as f:
+                self.assertEqual(json.loads(f.readline())["rule"], "center")
+        self.assertEqual(handler.board.history[-1], (10, 10, 1))
+
+    def test_takeback_and_restart(self):
+        handler = ProtocolHandler(ponder=False)
+        self.assertEqual(handler.process("RESTART"), "ERROR no board")
+        handler.process("START 20")
+        handler.process("INFO timeout_turn 300")
+        x, y = map(int, handler.process("BEGIN").split(","))
+        handler.process("TURN 11,11")
+        before = handler.board.hash
+        last = handler.board.last_move
+        self.assertEqual(handler.process(f"TAKEBACK {last[0]},{last[1]}"), "OK")
+        self.assertEqual(handler.process("TAKEBACK 11,11"), "OK")
+        self.assertEqual(handler.process("TAKEBACK 11,11"), "ERROR no stone there")
+        self.assertNotEqual(handler.board.hash, before)
+        self.assertEqual(handler.board.history, [(x, y, 1)])
+        self.assertEqual(handler.process("RESTART"), "OK")
+        self.assertEqual(handler.board.history, [])
+        self.assertEqual(handler.board.hash, 0)
+        self.assertEqual(handler.process("BEGIN"), "10,10")
+
+
+class TestTrace(unittest.TestCase):
+    def test_disabled_reply_is_the_move_only(self):
+        handler = ProtocolHandler(ponder=False)
+        handler.tracer = Tracer(messages=False, path=None)
+        handler.process("START 20")
+        self.assertEqual(handler.process("BEGIN"), "10,10")
+
+    def test_messages_and_jsonl_record(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.jsonl")
+            handler = ProtocolHandler(ponder=False)
+            handler.tracer = Tracer(messages=True, path=path)
+            handler.process("START 20")
+            handler.process("INFO timeout_turn 500")
+            handler.process("BEGIN")
+            lines = handler.process("TURN 11,11").split("\n")
+            self.assertTrue(lines[0].startswith("MESSAGE search"))
+            self.assertTrue(lines[1].startswith("DEBUG "))
+            x, y = map(int, lines[-1].split(","))
+            self.assertEqual(handler.board.grid[y][x], 1)
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual([r["rule"] for r in records], ["center", "search"])
+        search = records[1]
+        self.assertEqual(search["move"], [x, y])
+        self.assertGreater(search["nodes"], 0)
+        self.assertGreaterEqual(search["depth"], 1)
+        self.assertIn("cutoffs", search)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import asyncio
+import socket
+import subprocess
+import tempfile
+import time
+from protocol.server import EngineServer, WorkerDied
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def ask(f, *lines):
+    for line in lines:
+        f.write(line + "\n")
+    f.flush()
+    return f.readline().strip()
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "pbrain.sock")
+        self.server = None
+
+    def tearDown(self):
+        if self.server is not None:
+            self.server.kill()
+            self.server.wait()
+        self.tmp.cleanup()
+
+    def start(self, workers):
+        self.server = subprocess.Popen(
+            [sys.executable, "-m", "protocol.server", "--unix", self.path, "--workers", str(workers)],
+            cwd=ROOT, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.perf_counter() + 10
+        while not os.path.exists(self.path) and time.perf_counter() < deadline:
+            time.sleep(0.05)
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path)
+        sock.settimeout(10)
+        return sock.makefile("rw")
+
+    def test_concurrent_sessions_over_unix_socket(self):
+        self.start(2)
+        clients = [self.connect() for _ in range(2)]
+        for f in clients:
+            self.assertEqual(ask(f, "INFO timeout_turn 300", "START 15"), "OK")
+        # the sessions have separate boards
+        self.assertEqual(ask(clients[0], "BEGIN"), "7,7")
+        reply = ask(clients[1], "BOARD", "7,7,2", "DONE")
+        x, y = map(int, reply.split(","))
+        self.assertNotEqual((x, y), (7, 7))
+        reply = ask(clients[0], "TURN 0,0")
+        self.assertNotEqual(reply, "0,0")
+        for f in clients:
+            f.write("END\n")
+            f.flush()
+            self.assertEqual(f.readline(), "")
+
+    def test_info_workers_is_ignored(self):
+        # both sessions share the only worker process
+        self.start(1)
+        first, second = self.connect(), self.connect()
+        self.assertEqual(ask(first, "INFO workers 2", "INFO timeout_turn 300", "START 15"), "OK")
+        self.assertEqual(ask(second, "INFO timeout_turn 300", "START 15"), "OK")
+        self.assertEqual(ask(first, "BEGIN"), "7,7")
+        x, y = map(int, ask(first, "TURN 8,8").split(","))
+        self.assertTrue(0 <= x < 15 and 0 <= y < 15)
+        self.assertEqual(ask(second, "BEGIN"), "7,7")
+
+
+class TestQueueing(unittest.TestCase):
+    def test_time_waiting_for_the_worker_counts(self):
+        server = EngineServer(1)
+
+        async def scenario():
+            server.attach(asyncio.get_running_loop())
+            worker = server.workers[0]
+            for line in ("START 20", "INFO timeout_turn 3000", "BEGIN"):
+                await asyncio.wait_for(server.ask(worker, 1, [line]), 10)
+            # queued for 2.5 s of its 2.3 s budget: only the minimum search is left
+            start = time.perf_counter()
+            reply, _ = await asyncio.wait_for(server.ask(worker, 1, ["TURN 0,0"], start - 2.5), 10)
+            self.assertLess(time.perf_counter() - start, 1)
+            self.assertRegex(reply, r"^\d+,\d+$")
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            server.close()
+
+
+class TestWorkerDeath(unittest.TestCase):
+    def test_dead_worker_is_replaced(self):
+        server = EngineServer(1)
+
+        async def scenario():
+            server.attach(asyncio.get_running_loop())
+            dead = server.workers[0]
+            owed = asyncio.get_running_loop().create_future()
+            dead.pending[1] = owed
+            dead.process.kill()
+            with self.assertRaises(WorkerDied):
+                await asyncio.wait_for(owed, 10)
+            self.assertFalse(dead.alive)
+            with self.assertRaises(WorkerDied):
+                await server.ask(dead, 1, ["START 15"])
+            replacement = server.workers[0]
+            self.assertIsNot(replacement, dead)
+            self.assertEqual(await asyncio.wait_for(server.ask(replacement, 2, ["START 15"]), 10), ("OK", False))
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            server.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
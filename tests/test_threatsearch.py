@@ -0,0 +1,59 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from game.board import Board
+from ai.threatsearch import ThreatSolver
+
+
+def make_board(stones):
+    board = Board(20)
+    for x, y, p in stones:
+        board.place_stone(x, y, p)
+    return board
+
+
+class TestThreatSolver(unittest.TestCase):
+    def setUp(self):
+        self.solver = ThreatSolver()
+
+    def test_double_four(self):
+        board = make_board([(4, 5, 2), (5, 5, 1), (6, 5, 1), (7, 5, 1),
+                            (8, 6, 1), (8, 7, 1), (8, 8, 1), (8, 9, 2)])
+        self.assertEqual(self.solver.solve_vcf(board, 1), (8, 5))
+
+    def test_four_then_open_four(self):
+        stones = [(3, 5, 2), (4, 5, 1), (5, 5, 1), (6, 5, 1),
+                  (8, 6, 1), (8, 7, 1), (8, 9, 2)]
+        board = make_board(stones)
+        self.assertEqual(self.solver.solve_vcf(board, 1), (8, 5))
+        self.assertEqual(len(board.history), len(stones))
+        board.place_stone(8, 5, 1)
+        board.place_stone(7, 5, 2)
+        self.assertEqual(self.solver.solve_vcf(board, 1), (8, 4))
+
+    def test_defender_five_refutes(self):
+        board = make_board([(4, 5, 2), (5, 5, 1), (6, 5, 1), (7, 5, 1),
+                            (8, 6, 1), (8, 7, 1), (8, 8, 1), (8, 9, 2),
+                            (0, 0, 2), (0, 1, 2), (0, 2, 2), (0, 3, 2)])
+        self.assertIsNone(self.solver.solve_vcf(board, 1))
+        self.assertEqual(self.solver.solve_vcf(board, 2), (0, 4))
+
+    def test_vct_with_open_threes(self):
+        board = make_board([(8, 9, 1), (9, 9, 1), (10, 10, 1), (10, 11, 1),
+                            (2, 2, 2), (15, 15, 2)])
+        self.assertIsNone(self.solver.solve_vcf(board, 1))
+        self.assertEqual(self.solver.solve_vct(board, 1), (10, 9))
+        self.assertEqual(board.watchers, [])
+
+    def test_quiet_position_and_budget(self):
+        board = make_board([(10, 10, 1), (11, 11, 2)])
+        self.assertIsNone(self.solver.solve_vct(board, 1))
+        tiny = ThreatSolver(max_nodes=1)
+        busy = make_board([(8, 9, 1), (9, 9, 1), (10, 10, 1), (10, 11, 1)])
+        self.assertIsNone(tiny.solve_vct(busy, 1))
+        self.assertEqual(len(busy.history), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import random
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from game.board import Board
+from ai import vectorized
+from ai.minimax import MinimaxAI
+from ai.patterns import PatternDetector
+
+
+def random_board(size, seed):
+    rng = random.Random(seed)
+    board = Board(size)
+    for i in range(rng.randint(1, size * size // 3)):
+        board.place_stone(rng.randrange(size), rng.randrange(size), 1 + i % 2)
+    return board
+
+
+@unittest.skipUnless(vectorized.NUMPY_AVAILABLE, "NumPy not installed")
+class TestVectorizedBackend(unittest.TestCase):
+    def test_matches_python_evaluator(self):
+        ai = MinimaxAI()
+        boards = [random_board(15, seed) for seed in range(10)]
+        batch = vectorized.np.stack([vectorized.to_array(b) for b in boards])
+        for player in (1, 2):
+            scores = vectorized.evaluate_batch(batch, player)
+            self.assertEqual(list(scores), [ai.evaluate_full(b, player) for b in boards])
+
+    def test_matches_pattern_detector(self):
+        for seed in range(10):
+            board = random_board(random.Random(seed).choice((7, 20)), seed)
+            detector = PatternDetector(board)
+            for player in (1, 2):
+                packed = vectorized.analyze_batch(vectorized.to_array(board), player)[0]
+                for y in range(board.size):
+                    for x in range(board.size):
+                        if board.grid[y][x] == 0:
+                            self.assertEqual(packed[y, x], detector.analyze_packed(x, y, player))
+                self.assertEqual(
+                    vectorized.find_critical_moves(board, player),
+                    detector.find_critical_moves(player),
+                )
+
+    def test_numpy_backend_search(self):
+        board = random_board(20, 3)
+        python = MinimaxAI().minimax(board, 2, -float("inf"), float("inf"), True, 1)
+        numpy = MinimaxAI(backend="numpy").minimax(board, 2, -float("inf"), float("inf"), True, 1)
+        self.assertEqual(python, numpy)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Analyse a stream of positions on a pool of engine processes.
+
+Positions come from a file or stdin, either as JSONL records
+
+    {"id": "g1-30", "size": 20, "stones": [[9, 9, 1], [10, 10, 2]], "player": 1}
+
+(player, the side to move, defaults to the side with fewer stones) or
+as protocol BOARD blocks, 1 being the side to move, with an optional
+START line setting the size of the blocks that follow:
+
+    python tools/analyze.py games.jsonl --depth 6 -o analysis.jsonl
+    cat positions.txt | python tools/analyze.py --format board --time-ms 500
+
+Every position gets one output record, in input order: the move the
+engine plays (through the same rules as in a game), the rule that chose
+it and, when it came from the search, the score, depth and principal
+variation; positions that are not legal (stones off the board or on
+the same cell, fields or a player other than 1 and 2) get an error
+record instead. Only a bounded window of positions is in flight at once, so
+inputs of any size stream through in constant memory.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from protocol.handler import ProtocolHandler
+from protocol.trace import Tracer
+
+
+DEFAULT_TIME_MS = 1000
+# positions in flight per worker
+WINDOW_PER_WORKER = 4
+
+Position = tuple[object, int, list[tuple[int, int, int]]]
+
+_handler: ProtocolHandler | None = None
+
+
+def check_stones(size: int, stones: list[tuple[int, int, int]]) -> None:
+    """ValueError unless every stone is on its own cell of the board and
+    belongs to player 1 or 2; the engine would silently drop the others"""
+    seen = set()
+    for x, y, p in stones:
+        if not (0 <= x < size and 0 <= y < size):
+            raise ValueError(f"stone {x},{y} is off the {size}x{size} board")
+        if p not in (1, 2):
+            raise ValueError(f"stone {x},{y} has field {p}, not 1 or 2")
+        if (x, y) in seen:
+            raise ValueError(f"cell {x},{y} is given twice")
+        seen.add((x, y))
+
+
+def read_jsonl(lines: Iterable[str]) -> Iterator[Position | dict]:
+    """(id, size, stones with 1 = side to move), or an error record"""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            stones = [(int(x), int(y), int(p)) for x, y, p in record["stones"]]
+            ident = record.get("id", number)
+            size = int(record.get("size", 20))
+            check_stones(size, stones)
+            counts = [sum(1 for s in stones if s[2] == p) for p in (1, 2)]
+            player = int(record.get("player") or (1 if counts[0] <= counts[1] else 2))
+            if player not in (1, 2):
+                raise ValueError(f"player {player}, not 1 or 2")
+            if player == 2:
+                stones = [(x, y, 3 - p) for x, y, p in stones]
+            yield ident, size, stones
+        except (ValueError, KeyError, TypeError) as e:
+            yield {"id": number, "error": f"line {number}: {e}"}
+
+
+def read_board(lines: Iterable[str]) -> Iterator[Position | dict]:
+    """BOARD ... DONE blocks, numbered from 1"""
+    size, stones, count = 20, None, 0
+    for line in lines:
+        words = line.strip().upper().split()
+        if not words:
+            continue
+        if words[0] == "START" and len(words) == 2 and words[1].isdigit():
+            size = int(words[1])
+        elif words[0] == "BOARD":
+            stones = []
+        elif words[0] == "DONE" and stones is not None:
+            count += 1
+            try:
+                check_stones(size, stones)
+            except ValueError as e:
+                yield {"id": count, "error": str(e)}
+            else:
+                yield count, size, stones
+            stones = None
+        elif stones is not None:
+            try:
+                x, y, p = map(int, line.split(","))
+                stones.append((x, y, p))
+            except ValueError:
+                count += 1
+                yield {"id": count, "error": f"bad stone {line.strip()!r}"}
+                stones = None
+
+
+def read_positions(stream, fmt: str) -> Iterator[Position | dict]:
+    lines = iter(stream)
+    if fmt == "auto":
+        first = next((line for line in lines if line.strip()), "")
+        fmt = "jsonl" if first.lstrip().startswith("{") else "board"
+        lines = _chain(first, lines)
+    return read_jsonl(lines) if fmt == "jsonl" else read_board(lines)
+
+
+def _chain(first: str, rest: Iterator[str]) -> Iterator[str]:
+    yield first
+    yield from rest
+
+
+def _init_worker(depth: int | None, time_ms: int) -> None:
+    global _handler
+    _handler = ProtocolHandler(ponder=False)
+    _handler.tracer = Tracer(messages=False, path=None)
+    if depth is not None:
+        _handler.ai.max_depth = depth
+    _handler.process(f"INFO timeout_turn {time_ms}")
+
+
+def analyze(position: Position) -> dict:
+    """Play the side to move once, through the protocol rules"""
+    ident, size, stones = position
+    handler = _handler
+    if handler.board is None or handler.board.size != size:
+        if handler.process(f"START {size}") != "OK":
+            return {"id": ident, "error": f"unsupported size {size}"}
+    start = time.perf_counter()
+    try:
+        reply = handler.handle_board_lines([f"{x},{y},{p}" for x, y, p in stones])
+    except Exception as e:
+        # the next position starts from a fresh board
+        handler.board = None
+        return {"id": ident, "error": f"{type(e).__name__}: {e}"}
+    elapsed = time.perf_counter() - start
+    try:
+        x, y = map(int, reply.split(","))
+    except ValueError:
+        return {"id": ident, "error": reply}
+    search = handler.tracer.search
+    return {
+        "id": ident,
+        "move": [x, y],
+        "rule": handler.tracer.rule,
+        "score": search.get("score"),
+        "pv": search.get("pv") or [[x, y]],
+        "depth": search.get("depth"),
+        "nodes": search.get("nodes", 0),
+        "time_ms": round(elapsed * 1000, 2),
+    }
+
+
+def run(positions: Iterable[Position | dict], out, jobs: int, depth: int | None, time_ms: int) -> int:
+    """Write one record per position in input order, returns the count"""
+    window: deque = deque()
+    written = 0
+
+    def flush_one() -> None:
+        nonlocal written
+        item = window.popleft()
+        if isinstance(item, dict):
+            record = item
+        else:
+            ident, future = item
+            try:
+                record = future.result()
+            except Exception as e:
+                # a dead worker process fails its positions, not the run
+                record = {"id": ident, "error": f"{type(e).__name__}: {e}"}
+        out.write(json.dumps(record) + "\n")
+        written += 1
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(depth, time_ms)) as pool:
+        for position in positions:
+            if len(window) >= jobs * WINDOW_PER_WORKER:
+                flush_one()
+            # parse errors keep their place in the output
+            if isinstance(position, dict):
+                window.append(position)
+                continue
+            try:
+                window.append((position[0], pool.submit(analyze, position)))
+            except Exception as e:
+                window.append({"id": position[0], "error": f"{type(e).__name__}: {e}"})
+        while window:
+            flush_one()
+    out.flush()
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", nargs="?", default="-", help="positions file, - for stdin (default)")
+    parser.add_argument("--format", choices=("auto", "jsonl", "board"), default="auto")
+    parser.add_argument("--depth", type=int, help="search depth limit, within the time per position")
+    parser.add_argument("--time-ms", type=int, default=DEFAULT_TIME_MS,
+                        help="time per position, the solvers included (default %(default)s)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("-o", "--output", help="write JSONL here instead of stdout")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == "-" else open(args.input)
+    out = open(args.output, "w") if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        count = run(read_positions(source, args.format), out, max(args.jobs, 1), args.depth, args.time_ms)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"{count} positions in {elapsed:.1f}s ({count / elapsed if elapsed else 0:.1f}/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""Play two pbrain engines against each other over the protocol.
+
+Engines are command lines, optionally prefixed with environment
+assignments; the default for both is this engine:
+
+    python tools/arena.py --games 200 --concurrency 4 --turn-ms 500 \\
+        --engine "base=./pbrain-gomoku-ai" \\
+        --engine "bits=PBRAIN_BOARD=bitboard ./pbrain-gomoku-ai" -o games.jsonl
+    python tools/arena.py --engine "a=tcp://127.0.0.1:7070" --engine "b=unix:///tmp/b.sock"
+    python tools/arena.py --summary games.jsonl
+
+Every opening (a few random stones near the center) is played twice
+with colours swapped. Each finished game is appended to the JSONL output
+as soon as it ends; the summary gives the first engine's Elo difference
+with a 95% interval, time-per-move percentiles and timeout counts.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import select
+import shlex
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from game.board import Board
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_ENGINE = os.path.join(ROOT, "pbrain-gomoku-ai")
+# allowance on top of timeout_turn for process and pipe latency
+GRACE_MS = 200
+# time an engine gets to answer START
+START_TIMEOUT = 10.0
+
+
+class EngineError(Exception):
+    """The engine crashed, answered nonsense or ran out of time"""
+
+    def __init__(self, reason: str, detail: str = ""):
+        super().__init__(f"{reason}: {detail}" if detail else reason)
+        self.reason = reason
+
+
+def parse_engine(spec: str) -> tuple[str, list[str], dict[str, str]]:
+    """'name=VAR=value command args' into (name, argv, extra environment)"""
+    name, _, command = spec.partition("=")
+    if not command:
+        raise ValueError(f"engine spec {spec!r} is not name=[VAR=value ...] command")
+    tokens = shlex.split(command)
+    env = {}
+    while tokens and "=" in tokens[0] and not tokens[0].startswith(("/", ".")):
+        key, _, value = tokens.pop(0).partition("=")
+        env[key] = value
+    if not tokens:
+        tokens = [sys.executable, DEFAULT_ENGINE]
+    return name, tokens, env
+
+
+def connect(address: str) -> socket.socket:
+    """Socket to a protocol server, 'tcp://host:port' or 'unix:///path'"""
+    if address.startswith("unix://"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(address[len("unix://"):])
+    else:
+        host, _, port = address[len("tcp://"):].rpartition(":")
+        sock = socket.create_connection((host, int(port)))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+class Engine:
+    """One engine subprocess spoken to line by line over its pipes.
+
+    A command of the form tcp://host:port or unix:///path opens a session
+    on a running protocol server (protocol/server.py) instead.
+    """
+
+    def __init__(self, argv: list[str], env: dict[str, str]):
+        self.proc: subprocess.Popen | None = None
+        self.sock: socket.socket | None = None
+        try:
+            if argv[0].startswith(("tcp://", "unix://")):
+                self.sock = connect(argv[0])
+                self.fd = self.sock.fileno()
+            else:
+                self.proc = subprocess.Popen(
+                    argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                    cwd=ROOT, env={**os.environ, **env},
+                )
+                self.fd = self.proc.stdout.fileno()
+        except (OSError, ValueError) as e:
+            raise EngineError("crash", str(e))
+        self.buffer = b""
+        self.messages: list[str] = []
+
+    def send(self, line: str) -> None:
+        try:
+            if self.sock is not None:
+                self.sock.sendall(line.encode() + b"\n")
+            else:
+                self.proc.stdin.write(line.encode() + b"\n")
+                self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise EngineError("crash", str(e))
+
+    def readline(self, timeout: float) -> str:
+        deadline = time.perf_counter() + timeout
+        fd = self.fd
+        while b"\n" not in self.buffer:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise EngineError("timeout")
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                raise EngineError("crash", "engine closed its output")
+            self.buffer += chunk
+        line, self.buffer = self.buffer.split(b"\n", 1)
+        return line.decode(errors="replace").strip()
+
+    def reply(self, timeout: float) -> str:
+        """Next line that is not MESSAGE, DEBUG or empty"""
+        deadline = time.perf_counter() + timeout
+        while True:
+            line = self.readline(deadline - time.perf_counter())
+            word = line.split(" ", 1)[0].upper()
+            if word in ("MESSAGE", "DEBUG"):
+                self.messages.append(line)
+            elif line:
+                return line
+
+    def close(self) -> None:
+        if self.sock is not None:
+            try:
+                self.send("END")
+            except EngineError:
+                pass
+            self.sock.close()
+            return
+        try:
+            self.send("END")
+            self.proc.wait(timeout=1)
+        except (EngineError, subprocess.TimeoutExpired):
+            self.proc.kill()
+            self.proc.wait()
+
+
+def parse_move(line: str, board: Board) -> tuple[int, int]:
+    try:
+        x, y = (int(v) for v in line.split(","))
+    except ValueError:
+        raise EngineError("illegal", line)
+    if not board.is_valid_move(x, y):
+        raise EngineError("illegal", line)
+    return x, y
+
+
+def random_opening(size: int, stones: int, rng: random.Random) -> list[tuple[int, int]]:
+    c, spread = size // 2, 2
+    moves: list[tuple[int, int]] = []
+    while len(moves) < stones:
+        move = (c + rng.randint(-spread, spread), c + rng.randint(-spread, spread))
+        if move not in moves:
+            moves.append(move)
+    return moves
+
+
+def play_game(
+    game: int, engines: list[tuple[str, list[str], dict[str, str]]], black: int,
+    opening: list[tuple[int, int]], size: int, turn_ms: int, match_ms: int, grace_ms: int,
+) -> dict:
+    """One game; black is the index of the engine moving first"""
+    board = Board(size)
+    names = [engines[black][0], engines[1 - black][0]]
+    record = {
+        "game": game, "engines": [engines[0][0], engines[1][0]],
+        "black": names[0], "white": names[1], "opening": opening,
+        "winner": None, "reason": "draw", "moves": [],
+        "times": {names[0]: [], names[1]: []}, "timeouts": {names[0]: 0, names[1]: 0},
+    }
+    procs: list[Engine] = []
+    side = 0
+    try:
+        for side, index in enumerate((black, 1 - black)):
+            _, argv, env = engines[index]
+            procs.append(Engine(argv, env))
+        for side, engine in enumerate(procs):
+            engine.send(f"START {size}")
+            if engine.reply(START_TIMEOUT) != "OK":
+                raise EngineError("crash", "START refused")
+            engine.send(f"INFO timeout_turn {turn_ms}")
+            engine.send(f"INFO timeout_match {match_ms}")
+            engine.send("INFO rule 0")
+        for i, move in enumerate(opening):
+            board.make_move(*move, 1 + i % 2)
+        time_left = [match_ms, match_ms]
+        started = [False, False]
+
+        while len(board.history) < size * size:
+            side = len(board.history) % 2
+            engine = procs[side]
+            if match_ms:
+                engine.send(f"INFO time_left {time_left[side]}")
+            if not board.history:
+                command = ["BEGIN"]
+            elif not started[side]:
+                # joins the game after the opening: send the whole position
+                me = side + 1
+                command = ["BOARD"] + [
+                    f"{x},{y},{1 if p == me else 2}" for x, y, p in board.history
+                ] + ["DONE"]
+            else:
+                x, y, _ = board.history[-1]
+                command = [f"TURN {x},{y}"]
+            started[side] = True
+
+            limit = turn_ms / 1000
+            if match_ms:
+                limit = min(limit, time_left[side] / 1000) if turn_ms else time_left[side] / 1000
+            start = time.perf_counter()
+            for line in command:
+                engine.send(line)
+            answer = engine.reply(limit + grace_ms / 1000)
+            spent = time.perf_counter() - start
+            record["times"][names[side]].append(round(spent * 1000, 2))
+            if spent > limit + grace_ms / 1000:
+                raise EngineError("timeout")
+            time_left[side] -= int(spent * 1000)
+
+            x, y = parse_move(answer, board)
+            board.make_move(x, y, side + 1)
+            record["moves"].append([x, y])
+            if board.last_move_wins():
+                record["winner"], record["reason"] = names[side], "five"
+                break
+    except EngineError as e:
+        record["winner"], record["reason"] = names[1 - side], f"{names[side]} {e.reason}"
+        if e.reason == "timeout":
+            record["timeouts"][names[side]] += 1
+    finally:
+        for engine in procs:
+            engine.close()
+    return record
+
+
+def percentile(samples: list[float], q: float) -> float:
+    rank = max(1, -(-len(samples) * q // 100))
+    return samples[int(rank) - 1]
+
+
+def elo(score: float) -> float:
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def summarize(records: list[dict]) -> dict:
+    """Elo of the first engine against the second with a 95% interval"""
+    first, other = records[0]["engines"]
+    scores = [1.0 if r["winner"] == first else 0.5 if r["winner"] is None else 0.0 for r in records]
+    n = len(scores)
+    mean = sum(scores) / n
+    dev = math.sqrt(sum((s - mean) ** 2 for s in scores) / (n - 1)) if n > 1 else 0.0
+    margin = 1.96 * dev / math.sqrt(n)
+
+    summary = {
+        "games": n,
+        "engines": [first, other],
+        "wins": scores.count(1.0),
+        "draws": scores.count(0.5),
+        "losses": scores.count(0.0),
+        "score": mean,
+        "elo": elo(mean),
+        "elo_95": [elo(mean - margin), elo(mean + margin)],
+        "engines_stats": {},
+    }
+    for name in (first, other):
+        times = sorted(t for r in records for t in r["times"].get(name, []))
+        stats = {"moves": len(times), "timeouts": sum(r["timeouts"].get(name, 0) for r in records)}
+        if times:
+            stats.update({
+                "p50_ms": percentile(times, 50), "p95_ms": percentile(times, 95),
+                "p99_ms": percentile(times, 99), "max_ms": times[-1],
+            })
+        summary["engines_stats"][name] = stats
+    reasons: dict[str, int] = {}
+    for r in records:
+        reasons[r["reason"]] = reasons.get(r["reason"], 0) + 1
+    summary["results"] = reasons
+    return summary
+
+
+def print_summary(summary: dict) -> None:
+    first, other = summary["engines"]
+    low, high = summary["elo_95"]
+    print(f"{first} vs {other}: +{summary['wins']} ={summary['draws']} -{summary['losses']}"
+          f" ({summary['games']} games, score {summary['score']:.3f})", file=sys.stderr)
+    print(f"Elo {summary['elo']:+.1f}  95% [{low:+.1f}, {high:+.1f}]", file=sys.stderr)
+    for name, stats in summary["engines_stats"].items():
+        line = f"  {name:<12} moves {stats['moves']:>6}  timeouts {stats['timeouts']:>3}"
+        if stats["moves"]:
+            line += (f"  ms/move p50 {stats['p50_ms']:.0f} p95 {stats['p95_ms']:.0f}"
+                     f" p99 {stats['p99_ms']:.0f} max {stats['max_ms']:.0f}")
+        print(line, file=sys.stderr)
+    for reason, count in sorted(summary["results"].items()):
+        print(f"  {reason:<24} {count}", file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engine", action="append", default=[], help="name=[VAR=value ...] command (twice)")
+    parser.add_argument("--games", type=int, default=20, help="games to play, rounded up to an even number")
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--size", type=int, default=20)
+    parser.add_argument("--turn-ms", type=int, default=1000, help="INFO timeout_turn")
+    parser.add_argument("--match-ms", type=int, default=0, help="INFO timeout_match, 0 for none")
+    parser.add_argument("--grace-ms", type=int, default=GRACE_MS, help="tolerated overrun per move")
+    parser.add_argument("--opening-stones", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="append game records here (JSONL) instead of stdout")
+    parser.add_argument("--summary", metavar="JSONL", help="only summarize an existing results file")
+    args = parser.parse_args()
+
+    if args.summary:
+        with open(args.summary) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        if not records:
+            sys.exit("no games in " + args.summary)
+        print_summary(summarize(records))
+        return
+
+    specs = args.engine or ["a=" + DEFAULT_ENGINE, "b=" + DEFAULT_ENGINE]
+    if len(specs) != 2:
+        sys.exit("exactly two --engine options are needed")
+    engines = [parse_engine(spec) for spec in specs]
+    if engines[0][0] == engines[1][0]:
+        sys.exit("engine names must differ")
+
+    rng = random.Random(args.seed)
+    out = open(args.output, "a") if args.output else sys.stdout
+    records = []
+    with ProcessPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = []
+        for pair in range((args.games + 1) // 2):
+            opening = random_opening(args.size, args.opening_stones, rng)
+            for black in (0, 1):
+                futures.append(pool.submit(
+                    play_game, 2 * pair + black, engines, black, opening,
+                    args.size, args.turn_ms, args.match_ms, args.grace_ms,
+                ))
+        try:
+            for future in as_completed(futures):
+                record = future.result()
+                records.append(record)
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+    if out is not sys.stdout:
+        out.close()
+    if records:
+        print_summary(summarize(records))
+
+
+if __name__ == "__main__":
+    main()
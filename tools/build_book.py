@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Build the opening book from game records and/or self-play.
+
+Game records are text files with one game per line, moves written as
+"x,y" separated by spaces, the first move being the first player's:
+
+    python tools/build_book.py --size 20 --games records.txt -o opening.book
+    python tools/build_book.py --size 20 --self-play 200 --move-time 0.5
+"""
+import argparse
+import random
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ai.book import DEFAULT_PATH, MAX_BOOK_STONES, build_book, to_move_as_one
+from ai.minimax import MinimaxAI
+from game.board import Board
+
+
+def read_games(path: str) -> list[list[tuple[int, int]]]:
+    games = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            moves = []
+            for token in line.replace(";", " ").split():
+                x, y = token.split(",")
+                moves.append((int(x), int(y)))
+            games.append(moves)
+    return games
+
+
+def self_play(size: int, games: int, move_time: float, plies: int, seed: int) -> list[list[tuple[int, int]]]:
+    """Short engine-vs-engine openings from a randomised first move"""
+    rng = random.Random(seed)
+    ai = MinimaxAI(depth=10)
+    played = []
+    c = size // 2
+    for _ in range(games):
+        board = Board(size)
+        moves = [(c + rng.randint(-1, 1), c + rng.randint(-1, 1))]
+        board.make_move(*moves[0], 1)
+        for ply in range(1, plies):
+            player = 1 + ply % 2
+            move = ai.find_best_move(board, player, time.perf_counter() + move_time)
+            if move is None:
+                break
+            board.make_move(*move, player)
+            moves.append(move)
+            if board.last_move_wins():
+                break
+        played.append(moves)
+    return played
+
+
+def positions(games: list[list[tuple[int, int]]], plies: int):
+    for moves in games:
+        stones = []
+        for ply, move in enumerate(moves[: plies + 1]):
+            player = 1 + ply % 2
+            yield to_move_as_one(stones, player), move
+            stones.append((move[0], move[1], player))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=20)
+    parser.add_argument("--games", action="append", default=[], help="game record file (repeatable)")
+    parser.add_argument("--self-play", type=int, default=0, help="number of self-play openings")
+    parser.add_argument("--move-time", type=float, default=0.5, help="seconds per self-play move")
+    parser.add_argument("--plies", type=int, default=MAX_BOOK_STONES, help="plies kept per game")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default=DEFAULT_PATH)
+    args = parser.parse_args()
+
+    games = []
+    for path in args.games:
+        games.extend(read_games(path))
+    if args.self_play:
+        games.extend(self_play(args.size, args.self_play, args.move_time, args.plies, args.seed))
+    if not games:
+        parser.error("nothing to build from, give --games and/or --self-play")
+
+    count = build_book(args.output, args.size, positions(games, args.plies))
+    print(f"{args.output}: {count} positions from {len(games)} games")
+
+
+if __name__ == "__main__":
+    main()